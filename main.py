@@ -29,13 +29,17 @@ import math
 import random
 import socket
 import json
+import struct
 import sys
 import traceback
 import subprocess
 import ipaddress
 from datetime import datetime
+from collections import deque
 import re
 
+APP_START_TIME = time.monotonic()
+
 class AssetsManager:
     def __init__(self, assets_dir='assets'):
         self.assets_dir = assets_dir
@@ -213,9 +217,11 @@ class SettingsManager:
         default_settings = {
             'sensitivity': 1.0,
             'accelerometer_mode': False,
+            'auto_connect': True,
             'steering_sensitivity': 1.0,
             'battery_warning_level': 30,
             'last_connected_device': '',
+            'last_connection_type': '',
             'connection_type': 'ble',
             'classic_device_address': '',
             'classic_device_port': '1',
@@ -228,6 +234,27 @@ class SettingsManager:
             'vibration_enabled': True,
             'pedal_min_vibration': 0.1,
             'pedal_max_vibration': 1.0,
+            'wifi_socket_profile': 'low_latency',
+            'wifi_control_transport': 'tcp',
+            'wifi_udp_port': 4210,
+            'control_rate_hz': 30,
+            'command_refresh_interval': 1.0,
+            'binary_protocol': False,
+            'control_loop_mode': False,
+            'control_loop_interval_ms': 50,
+            'gatt_cache': {},
+            'ble_scan_name_prefixes': [],
+            'ble_scan_service_uuids': [],
+            'tilt_filter': 'none',
+            'tilt_filter_alpha': 0.3,
+            'tilt_filter_min_cutoff': 1.0,
+            'tilt_filter_beta': 0.02,
+            'tilt_filter_median_size': 5,
+            'tilt_deadzone': 2.0,
+            'tilt_hysteresis': 1.0,
+            'tilt_sensor_mode': 'auto',
+            'tilt_neutral': None,
+            'tilt_profile': 'default',
         }
         
         try:
@@ -240,7 +267,7 @@ class SettingsManager:
             print(f"Error resetting settings to default: {e}")
             return {}
     
-    def add_saved_wifi_connection(self, ip, port, connection_name=""):
+    def add_saved_wifi_connection(self, ip, port, connection_name="", socket_profile="low_latency"):
         try:
             saved_connections = self.get('saved_wifi_connections', [])
             
@@ -248,6 +275,7 @@ class SettingsManager:
                 "ip": ip,
                 "port": int(port),
                 "name": connection_name or f"RC_Car_{ip}",
+                "socket_profile": socket_profile,
                 "timestamp": time.time(),
                 "last_used": time.time()
             }
@@ -287,6 +315,47 @@ class SettingsManager:
         except Exception as e:
             print(f"Error updating connection usage: {e}")
     
+    def set_wifi_connection_profile(self, ip, port, socket_profile):
+        try:
+            connections = self.get('saved_wifi_connections', [])
+            for conn in connections:
+                if conn["ip"] == ip and conn["port"] == int(port):
+                    conn["socket_profile"] = socket_profile
+                    break
+            
+            self.store.put('saved_wifi_connections', value=connections)
+            print(f"Socket profile for {ip}:{port} set to {socket_profile}")
+        except Exception as e:
+            print(f"Error updating socket profile: {e}")
+    
+    def get_tilt_profiles(self):
+        try:
+            return self.get('tilt_profiles', {})
+        except Exception as e:
+            print(f"Error getting tilt profiles: {e}")
+            return {}
+    
+    def get_tilt_profile(self, name):
+        return self.get_tilt_profiles().get(name)
+    
+    def save_tilt_profile(self, name, calibration):
+        try:
+            profiles = self.get_tilt_profiles()
+            profiles[name] = dict(calibration, last_used=time.time())
+            self.store.put('tilt_profiles', value=profiles)
+            print(f"Tilt profile saved: {name}")
+        except Exception as e:
+            print(f"Error saving tilt profile: {e}")
+    
+    def remove_tilt_profile(self, name):
+        try:
+            profiles = self.get_tilt_profiles()
+            profiles.pop(name, None)
+            self.store.put('tilt_profiles', value=profiles)
+            print(f"Removed tilt profile: {name}")
+        except Exception as e:
+            print(f"Error removing tilt profile: {e}")
+    
     def clear_wifi_history(self):
         try:
             self.store.put('saved_wifi_connections', value=[])
@@ -446,12 +515,258 @@ class VibrationManager:
     def signal_lost_vibrate(self):
         self.vibrate_duration(700, 0.9)
 
+TILT_FILTERS = ('none', 'exponential', 'one_euro', 'median')
+
+SENSOR_TYPE_ACCELEROMETER = 1
+SENSOR_TYPE_GYROSCOPE = 4
+SENSOR_TYPE_GAME_ROTATION_VECTOR = 15
+
+TILT_SENSOR_BACKENDS = {
+    'auto': ('rotation_vector', 'fusion', 'accelerometer'),
+    'rotation_vector': ('rotation_vector', 'fusion', 'accelerometer'),
+    'fusion': ('fusion', 'accelerometer'),
+    'accelerometer': ('accelerometer',),
+}
+
+# ماتریس‌های 3x3 به صورت تاپل ۹تایی سطری
+IDENTITY_ORIENTATION = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0)
+LANDSCAPE_ORIENTATION = (0.0, -1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+def _mat3_mul(a, b):
+    return tuple(
+        a[row * 3] * b[col] + a[row * 3 + 1] * b[3 + col] + a[row * 3 + 2] * b[6 + col]
+        for row in range(3) for col in range(3)
+    )
+
+def _mat3_apply(m, x, y, z):
+    return (
+        m[0] * x + m[1] * y + m[2] * z,
+        m[3] * x + m[4] * y + m[5] * z,
+        m[6] * x + m[7] * y + m[8] * z,
+    )
+
+def _rotation_between(a, b):
+    """کوچک‌ترین چرخشی که بردار واحد a را روی بردار واحد b می‌برد (Rodrigues)"""
+    vx = a[1] * b[2] - a[2] * b[1]
+    vy = a[2] * b[0] - a[0] * b[2]
+    vz = a[0] * b[1] - a[1] * b[0]
+    c = a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+    if c <= -1.0 + 1e-9:
+        return IDENTITY_ORIENTATION
+    
+    k = 1.0 / (1.0 + c)
+    return (
+        c + vx * vx * k, -vz + vx * vy * k, vy + vx * vz * k,
+        vz + vx * vy * k, c + vy * vy * k, -vx + vy * vz * k,
+        -vy + vx * vz * k, vx + vy * vz * k, c + vz * vz * k,
+    )
+
+class TiltFilter:
+    def __init__(self, kind='one_euro', alpha=0.3, min_cutoff=1.0, beta=0.02, d_cutoff=1.0,
+                 median_size=5, deadzone=2.0, hysteresis=1.0):
+        self.kind = kind if kind in TILT_FILTERS else 'none'
+        self.alpha = alpha
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.median_size = max(1, int(median_size)) | 1
+        self.deadzone = deadzone
+        self.hysteresis = hysteresis
+        
+        # حلقه و حافظه کمکی یک بار ساخته می‌شوند و در مسیر سنسور فقط بازنویسی می‌شوند
+        self._ring = [0.0] * self.median_size
+        self._scratch = [0.0] * self.median_size
+        self.reset()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            kind=get_setting('tilt_filter', 'none'),
+            alpha=float(get_setting('tilt_filter_alpha', 0.3)),
+            min_cutoff=float(get_setting('tilt_filter_min_cutoff', 1.0)),
+            beta=float(get_setting('tilt_filter_beta', 0.02)),
+            median_size=int(get_setting('tilt_filter_median_size', 5)),
+            deadzone=float(get_setting('tilt_deadzone', 2.0)),
+            hysteresis=float(get_setting('tilt_hysteresis', 1.0)),
+        )
+
+    def reset(self):
+        self._primed = False
+        self._prev = 0.0
+        self._prev_dx = 0.0
+        self._prev_time = 0.0
+        self._ring_index = 0
+        self._ring_count = 0
+        self._output = 0.0
+
+    @staticmethod
+    def _smoothing(dt, cutoff):
+        r = 2.0 * math.pi * cutoff * dt
+        return r / (r + 1.0)
+
+    def _median(self, value):
+        ring = self._ring
+        ring[self._ring_index] = value
+        self._ring_index = (self._ring_index + 1) % self.median_size
+        if self._ring_count < self.median_size:
+            self._ring_count += 1
+        
+        count = self._ring_count
+        scratch = self._scratch
+        for i in range(count):
+            scratch[i] = ring[i]
+        # insertion sort درجا روی بخش پرشده
+        for i in range(1, count):
+            item = scratch[i]
+            j = i - 1
+            while j >= 0 and scratch[j] > item:
+                scratch[j + 1] = scratch[j]
+                j -= 1
+            scratch[j + 1] = item
+        return scratch[count // 2]
+
+    def _smooth(self, value, timestamp):
+        if not self._primed:
+            self._primed = True
+            self._prev = value
+            self._prev_time = timestamp
+            return value
+        
+        if self.kind == 'exponential':
+            self._prev += self.alpha * (value - self._prev)
+        elif self.kind == 'one_euro':
+            dt = max(timestamp - self._prev_time, 1e-3)
+            dx = (value - self._prev) / dt
+            self._prev_dx += self._smoothing(dt, self.d_cutoff) * (dx - self._prev_dx)
+            cutoff = self.min_cutoff + self.beta * abs(self._prev_dx)
+            self._prev += self._smoothing(dt, cutoff) * (value - self._prev)
+        else:
+            self._prev = value
+        self._prev_time = timestamp
+        return self._prev
+
+    def apply(self, value, timestamp):
+        # بدون فیلتر، deadzone و hysteresis هم اعمال نمی‌شوند (رفتار قبلی)
+        if self.kind == 'none':
+            return value
+        if self.kind == 'median':
+            value = self._median(value)
+        value = self._smooth(value, timestamp)
+        
+        if abs(value) < self.deadzone:
+            value = 0.0
+        if abs(value - self._output) >= self.hysteresis or (value == 0.0 and self._output != 0.0):
+            self._output = value
+        return self._output
+
+def measure_filter_latency(tilt_filter, rate_hz=50, step=45.0, threshold=0.9):
+    """تاخیر پاسخ پله (ms) و هزینه پردازش هر نمونه (µs) برای یک فیلتر"""
+    tilt_filter.reset()
+    dt = 1.0 / rate_hz
+    settle_ms = None
+    started = time.perf_counter()
+    
+    samples = rate_hz * 2
+    for i in range(samples):
+        value = 0.0 if i < rate_hz // 5 else step
+        output = tilt_filter.apply(value, i * dt)
+        if settle_ms is None and value and output >= step * threshold:
+            settle_ms = ((i - rate_hz // 5) * dt) * 1000.0
+    
+    cost_us = (time.perf_counter() - started) / samples * 1e6
+    tilt_filter.reset()
+    return {'kind': tilt_filter.kind, 'step_latency_ms': settle_ms, 'cost_us': round(cost_us, 2)}
+
+TILT_CURVES = ('linear', 'expo', 'custom')
+TILT_CUSTOM_CURVE = [0.0, 0.1, 0.3, 0.6, 1.0]
+TILT_LUT_SIZE = 2049
+MIN_TILT_ENDPOINT = 5.0
+
+class TiltCalibration:
+    """نگاشت شیب به زاویه فرمان؛ asin، حساسیت، نقاط انتهایی و منحنی پاسخ در یک جدول از پیش محاسبه می‌شوند"""
+
+    def __init__(self, max_tilt_left=45.0, max_tilt_right=45.0, curve='linear', expo=0.4,
+                 curve_points=None, sensitivity=1.0, lut_size=TILT_LUT_SIZE):
+        self.max_tilt_left = max(MIN_TILT_ENDPOINT, min(90.0, float(max_tilt_left)))
+        self.max_tilt_right = max(MIN_TILT_ENDPOINT, min(90.0, float(max_tilt_right)))
+        self.curve = curve if curve in TILT_CURVES else 'linear'
+        self.expo = max(0.0, min(1.0, float(expo)))
+        self.curve_points = [max(0.0, min(1.0, float(p))) for p in (curve_points or [])]
+        self.sensitivity = sensitivity
+        self.lut_size = max(3, int(lut_size)) | 1
+        self.build()
+
+    @classmethod
+    def from_dict(cls, data, sensitivity=1.0):
+        data = data or {}
+        return cls(
+            max_tilt_left=data.get('max_tilt_left', 45.0),
+            max_tilt_right=data.get('max_tilt_right', 45.0),
+            curve=data.get('curve', 'linear'),
+            expo=data.get('expo', 0.4),
+            curve_points=data.get('curve_points'),
+            sensitivity=sensitivity,
+        )
+
+    def to_dict(self):
+        return {
+            'max_tilt_left': self.max_tilt_left,
+            'max_tilt_right': self.max_tilt_right,
+            'curve': self.curve,
+            'expo': self.expo,
+            'curve_points': list(self.curve_points),
+        }
+
+    def _shape(self, u):
+        if self.curve == 'expo':
+            return (1.0 - self.expo) * u + self.expo * u * u * u
+        if self.curve == 'custom' and len(self.curve_points) >= 2:
+            points = self.curve_points
+            position = u * (len(points) - 1)
+            index = int(position)
+            if index >= len(points) - 1:
+                return points[-1]
+            return points[index] + (points[index + 1] - points[index]) * (position - index)
+        return u
+
+    def build(self):
+        half = (self.lut_size - 1) // 2
+        lut = [0.0] * self.lut_size
+        for i in range(self.lut_size):
+            tilt = -math.degrees(math.asin((i - half) / half)) * self.sensitivity
+            limit = self.max_tilt_right if tilt > 0 else self.max_tilt_left
+            lut[i] = math.copysign(self._shape(min(1.0, abs(tilt) / limit)) * 90.0, tilt)
+        
+        # جایگزینی یکجا؛ ترد سنسور یا جدول قبلی را می‌بیند یا جدول کامل جدید را
+        self._half = half
+        self._lut = lut
+
+    def set_sensitivity(self, sensitivity):
+        self.sensitivity = sensitivity
+        self.build()
+
+    def lookup(self, sine):
+        """sine = x / |g| در قاب صفحه؛ بدون تابع مثلثاتی"""
+        half = self._half
+        index = int(sine * half + half + 0.5)
+        if index < 0:
+            index = 0
+        elif index > half * 2:
+            index = half * 2
+        return self._lut[index]
+
 class AccelerometerManager:
     def __init__(self):
         self.is_active = False
         self._sensor_manager = None
         self._sensor = None
         self._listener = None
+        self._sensors = []
+        self.sensor_backend = None
+        self._backend_candidates = ()
+        self._gravity = [0.0, 0.0, 1.0]
+        self._gyro_timestamp = 0
+        self.fusion_alpha = 0.98
         self._last_values = (0.0, 0.0, 0.0)
         self._poll_event = None
         self.controller = None
@@ -460,6 +775,33 @@ class AccelerometerManager:
         self._is_initialized = False
         self._start_attempted = False
         self._stop_requested = False
+        
+        # آخرین زاویه محاسبه‌شده در ترد سنسور؛ tick کنترل فقط همین را برمی‌دارد
+        self._pending_angle = None
+        self._tick_event = None
+        self.tick_rate = get_setting('control_rate_hz', 30)
+        self.samples_received = 0
+        self.samples_dropped = 0
+        self.samples_forwarded = 0
+        self.tilt_filter = TiltFilter.from_settings()
+        self.filter_cost_us = 0.0
+        self.last_tilt_active = 0.0
+        
+        # نگاشت جهت صفحه و کالیبراسیون نقطه خنثی در یک ماتریس؛ فقط با تغییر Window بازسازی می‌شود
+        self._last_gravity = None
+        self.capture_error = None
+        neutral = get_setting('tilt_neutral', None)
+        self._neutral = tuple(neutral) if neutral else None
+        self._screen_orientation = IDENTITY_ORIENTATION
+        self._orientation_matrix = IDENTITY_ORIENTATION
+        
+        self.calibration_profile = get_setting('tilt_profile', 'default')
+        profile = self._read_profile(self.calibration_profile)
+        self.calibration = TiltCalibration.from_dict(profile, self.sensitivity)
+        if profile and 'neutral' in profile:
+            self._neutral = tuple(profile['neutral']) if profile['neutral'] else None
+        self._on_window_changed()
+        Window.bind(size=self._on_window_changed, rotation=self._on_window_changed)
 
         if HAS_ANDROID:
             self.initialize_sensor()
@@ -470,7 +812,6 @@ class AccelerometerManager:
             
         try:
             PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            Sensor = autoclass('android.hardware.Sensor')
             SensorManager = autoclass('android.hardware.SensorManager')
             Context = autoclass('android.content.Context')
             
@@ -480,19 +821,56 @@ class AccelerometerManager:
                 print("Sensor service not available")
                 return False
                 
-            self._sensor = self._sensor_manager.getDefaultSensor(Sensor.TYPE_ACCELEROMETER)
+            mode = get_setting('tilt_sensor_mode', 'auto')
+            self._backend_candidates = [
+                backend for backend in TILT_SENSOR_BACKENDS.get(mode, TILT_SENSOR_BACKENDS['auto'])
+                if self._backend_sensors(backend)
+            ]
             
-            if not self._sensor:
+            if not self._backend_candidates:
                 print("Accelerometer not available on this device")
                 return False
-                
+            
+            self._select_backend(self._backend_candidates[0])
             self._is_initialized = True
-            print("Accelerometer initialized successfully")
+            print(f"Tilt sensor initialized successfully ({self.sensor_backend})")
             return True
         except Exception as e:
             print(f"Sensor initialization error: {e}")
             return False
 
+    def _backend_sensors(self, backend):
+        types = {
+            'rotation_vector': (SENSOR_TYPE_GAME_ROTATION_VECTOR,),
+            'fusion': (SENSOR_TYPE_ACCELEROMETER, SENSOR_TYPE_GYROSCOPE),
+            'accelerometer': (SENSOR_TYPE_ACCELEROMETER,),
+        }[backend]
+        sensors = [self._sensor_manager.getDefaultSensor(sensor_type) for sensor_type in types]
+        return sensors if all(sensors) else []
+
+    def _select_backend(self, backend):
+        self.sensor_backend = backend
+        self._sensors = self._backend_sensors(backend)
+        self._sensor = self._sensors[0]
+        self._gravity = [0.0, 0.0, 1.0]
+        self._gyro_timestamp = 0
+
+    def _register_listener(self, SensorManager):
+        """ثبت listener با اولین backend موجود؛ در صورت شکست backend بعدی امتحان می‌شود"""
+        for backend in self._backend_candidates[self._backend_candidates.index(self.sensor_backend):]:
+            self._select_backend(backend)
+            registered = [
+                self._sensor_manager.registerListener(self._listener, sensor, SensorManager.SENSOR_DELAY_GAME)
+                for sensor in self._sensors
+            ]
+            if all(registered):
+                print(f"Tilt sensor backend: {backend}")
+                return True
+            
+            print(f"Tilt sensor backend {backend} failed to register - falling back")
+            self._sensor_manager.unregisterListener(self._listener)
+        return False
+
     def start(self):
         if self.is_active:
             print("Accelerometer already active")
@@ -509,6 +887,7 @@ class AccelerometerManager:
             self.is_active = True
             if not self._poll_event:
                 self._poll_event = Clock.schedule_interval(self._poll_fake_accel, 0.1)
+            self._start_tick()
             print("Accelerometer simulation started")
             return True
             
@@ -538,11 +917,7 @@ class AccelerometerManager:
                     if not self.is_active:
                         return
                     try:
-                        values = event.values
-                        x = float(values[0])
-                        y = float(values[1])
-                        z = float(values[2])
-                        self.callback(x, y, z)
+                        self.callback(event.sensor.getType(), event.values, event.timestamp)
                     except Exception as e:
                         print(f"Sensor data error: {e}")
 
@@ -553,17 +928,14 @@ class AccelerometerManager:
                 def deactivate(self):
                     self.is_active = False
 
-            self._listener = AccelerometerEventListener(self.update_values)
+            self._listener = AccelerometerEventListener(self._on_sensor_event)
             
             SensorManager = autoclass('android.hardware.SensorManager')
-            success = self._sensor_manager.registerListener(
-                self._listener,
-                self._sensor,
-                SensorManager.SENSOR_DELAY_GAME
-            )
+            success = self._register_listener(SensorManager)
             
             if success:
                 self.is_active = True
+                self._start_tick()
                 print("Accelerometer started successfully")
                 return True
             else:
@@ -583,6 +955,7 @@ class AccelerometerManager:
         self.is_active = False
         self._start_attempted = False
         self._stop_requested = True
+        self._stop_tick()
         
         # 1. توقف شبیه‌سازی در حالت غیر-Android
         if not HAS_ANDROID:
@@ -621,9 +994,11 @@ class AccelerometerManager:
             # 4. ریست کردن متغیرها
             self._sensor_manager = None
             self._sensor = None
+            self._sensors = []
             self._is_initialized = False
             self._last_values = (0.0, 0.0, 0.0)
             self.steering_angle = 0
+            self.tilt_filter.reset()
             
             print("Accelerometer stopped successfully")
             return True
@@ -637,39 +1012,332 @@ class AccelerometerManager:
             self._is_initialized = False
             return True
 
+    def set_tick_rate(self, rate_hz):
+        self.tick_rate = max(1, int(rate_hz))
+        if self._tick_event:
+            self._start_tick()
+
+    def _start_tick(self):
+        self._stop_tick()
+        self._pending_angle = None
+        self._tick_event = Clock.schedule_interval(self._forward_latest, 1.0 / self.tick_rate)
+
+    def _stop_tick(self):
+        if self._tick_event:
+            self._tick_event.cancel()
+            self._tick_event = None
+        self._pending_angle = None
+
+    def _forward_latest(self, dt):
+        angle = self._pending_angle
+        if angle is None:
+            return
+        self._pending_angle = None
+        
+        if self.is_active and not self._stop_requested and self.controller:
+            self.samples_forwarded += 1
+            try:
+                self.controller.update_steering_from_accelerometer(angle)
+            except Exception as controller_error:
+                print(f"Controller callback error: {controller_error}")
+
+    def get_stats(self):
+        return {
+            'received': self.samples_received,
+            'dropped': self.samples_dropped,
+            'forwarded': self.samples_forwarded,
+            'tick_rate': self.tick_rate,
+            'backend': self.sensor_backend,
+            'filter': self.tilt_filter.kind,
+            'filter_cost_us': round(self.filter_cost_us, 2),
+        }
+
+    def set_filter(self, kind, **params):
+        keys = {
+            'alpha': 'tilt_filter_alpha',
+            'min_cutoff': 'tilt_filter_min_cutoff',
+            'beta': 'tilt_filter_beta',
+            'median_size': 'tilt_filter_median_size',
+            'deadzone': 'tilt_deadzone',
+            'hysteresis': 'tilt_hysteresis',
+        }
+        set_setting('tilt_filter', kind)
+        for name, value in params.items():
+            if name in keys:
+                set_setting(keys[name], value)
+        
+        self.tilt_filter = TiltFilter.from_settings()
+        print(f"Tilt filter set to: {self.tilt_filter.kind}")
+
+    def get_filter_latency(self):
+        """تاخیر پاسخ پله هر فیلتر با پارامترهای ذخیره‌شده"""
+        results = {}
+        for kind in TILT_FILTERS:
+            candidate = TiltFilter.from_settings()
+            candidate.kind = kind
+            results[kind] = measure_filter_latency(candidate, rate_hz=50)
+        return results
+
     def set_sensitivity(self, s):
         self.sensitivity = max(0.5, min(2.5, s))
+        self.calibration.set_sensitivity(self.sensitivity)
         set_setting('sensitivity', self.sensitivity)
         print(f"Sensitivity set to: {self.sensitivity}")
 
+    def _on_window_changed(self, *args):
+        try:
+            landscape = Window.width > Window.height
+        except Exception:
+            landscape = False
+        self._screen_orientation = LANDSCAPE_ORIENTATION if landscape else IDENTITY_ORIENTATION
+        self._rebuild_orientation_matrix()
+
+    def _rebuild_orientation_matrix(self):
+        matrix = self._screen_orientation
+        if self._neutral:
+            nx, ny, nz = self._neutral
+            plane = math.sqrt(ny * ny + nz * nz)
+            norm = math.sqrt(nx * nx + plane * plane)
+            if plane > 1e-6:
+                # فقط roll حالت خنثی حذف می‌شود؛ pitch نگه‌داشتن گوشی دست نمی‌خورد
+                neutral_fix = _rotation_between((nx / norm, ny / norm, nz / norm), (0.0, ny / plane, nz / plane))
+                matrix = _mat3_mul(neutral_fix, matrix)
+        
+        # جایگزینی یکجا؛ ترد سنسور همیشه یک ماتریس کامل می‌بیند
+        self._orientation_matrix = matrix
+
+    def set_neutral(self, gravity=None):
+        """ثبت بردار گرانش (در قاب صفحه) به عنوان نقطه خنثی؛ None کالیبراسیون را پاک می‌کند"""
+        self._neutral = tuple(float(v) for v in gravity) if gravity else None
+        set_setting('tilt_neutral', list(self._neutral) if self._neutral else None)
+        self._rebuild_orientation_matrix()
+        self.tilt_filter.reset()
+        self.save_calibration()
+        print(f"Neutral tilt set to: {self._neutral}")
+
+    def capture_neutral(self):
+        if self._last_gravity is None:
+            self.capture_error = "No tilt reading yet - try again"
+            print("No tilt sample to capture as neutral")
+            return False
+        self.set_neutral(_mat3_apply(self._screen_orientation, *self._last_gravity))
+        return True
+
     def get_orientation_adjusted_values(self, x, y, z):
-        if Window.width > Window.height:
-            x_adj = -y
-            y_adj = x
-            return x_adj, y_adj, z
+        return _mat3_apply(self._orientation_matrix, x, y, z)
+
+    def get_current_tilt(self):
+        """شیب فعلی نسبت به نقطه خنثی به درجه (بدون حساسیت و منحنی)"""
+        if self._last_gravity is None:
+            return None
+        x_adj, y_adj, z_adj = self.get_orientation_adjusted_values(*self._last_gravity)
+        norm = math.sqrt(x_adj * x_adj + y_adj * y_adj + z_adj * z_adj)
+        if norm < 1e-6:
+            return None
+        return -math.degrees(math.asin(max(-1.0, min(1.0, x_adj / norm))))
+
+    def capture_max_tilt(self, side=None):
+        """ثبت شیب فعلی به عنوان نقطه انتهایی چپ یا راست (بر اساس جهت شیب اگر side داده نشود)
+
+        جدول کالیبراسیون شیب ضرب‌شده در حساسیت را با نقطه انتهایی مقایسه می‌کند، پس همین مقدار ذخیره
+        می‌شود تا فرمان دقیقاً در زاویه ثبت‌شده به انتها برسد.
+        """
+        tilt = self.get_current_tilt()
+        if tilt is None:
+            self.capture_error = "No tilt reading yet - try again"
+            print("No tilt sample to capture as endpoint")
+            return False
+        
+        side = side or ('right' if tilt > 0 else 'left')
+        endpoint = tilt * self.sensitivity
+        if (endpoint > 0) != (side == 'right'):
+            self.capture_error = f"Tilt the phone to the {side} to capture it"
+            print(f"Tilt {tilt:.1f} does not match side {side}")
+            return False
+        if abs(endpoint) < MIN_TILT_ENDPOINT:
+            self.capture_error = f"Tilt further - at least {MIN_TILT_ENDPOINT:.0f}°"
+            print(f"Tilt {tilt:.1f} too small for an endpoint")
+            return False
+        
+        if side == 'right':
+            self.set_max_tilt(right=abs(endpoint))
         else:
-            return x, y, z
+            self.set_max_tilt(left=abs(endpoint))
+        return True
+
+    def set_max_tilt(self, left=None, right=None):
+        data = self.calibration.to_dict()
+        if left is not None:
+            data['max_tilt_left'] = left
+        if right is not None:
+            data['max_tilt_right'] = right
+        self._apply_calibration(data)
+        print(f"Max tilt set to: L {self.calibration.max_tilt_left:.1f} / R {self.calibration.max_tilt_right:.1f}")
+
+    def set_response_curve(self, curve, expo=None, points=None):
+        data = self.calibration.to_dict()
+        data['curve'] = curve
+        if expo is not None:
+            data['expo'] = expo
+        if points is not None:
+            data['curve_points'] = points
+        self._apply_calibration(data)
+        print(f"Response curve set to: {self.calibration.curve}")
+
+    def _apply_calibration(self, data):
+        self.calibration = TiltCalibration.from_dict(data, self.sensitivity)
+        self.tilt_filter.reset()
+        self.save_calibration()
+
+    def get_calibration(self):
+        data = self.calibration.to_dict()
+        data['neutral'] = list(self._neutral) if self._neutral else None
+        data['profile'] = self.calibration_profile
+        return data
+
+    def _read_profile(self, name):
+        try:
+            app = App.get_running_app()
+            if hasattr(app, 'settings_manager'):
+                return app.settings_manager.get_tilt_profile(name)
+        except Exception as e:
+            print(f"Could not read tilt profile {name}: {e}")
+        return None
+
+    def save_calibration(self, name=None):
+        self.calibration_profile = name or self.calibration_profile
+        profile = self.calibration.to_dict()
+        profile['neutral'] = list(self._neutral) if self._neutral else None
+        try:
+            app = App.get_running_app()
+            if hasattr(app, 'settings_manager'):
+                app.settings_manager.save_tilt_profile(self.calibration_profile, profile)
+                set_setting('tilt_profile', self.calibration_profile)
+                return True
+        except Exception as e:
+            print(f"Could not save tilt profile {self.calibration_profile}: {e}")
+        return False
+
+    def reset_calibration(self):
+        """پروفایل فعال را به 'default' با مقادیر کارخانه برمی‌گرداند؛ پروفایل‌های نام‌دار حفظ می‌شوند"""
+        self.calibration_profile = 'default'
+        self.calibration = TiltCalibration(sensitivity=self.sensitivity)
+        self._neutral = None
+        set_setting('tilt_neutral', None)
+        self._rebuild_orientation_matrix()
+        self.tilt_filter.reset()
+        self.save_calibration()
+        print("Tilt calibration reset to default")
+
+    def get_calibration_profiles(self):
+        try:
+            app = App.get_running_app()
+            if hasattr(app, 'settings_manager'):
+                return sorted(app.settings_manager.get_tilt_profiles())
+        except Exception as e:
+            print(f"Could not list tilt profiles: {e}")
+        return []
+
+    def load_calibration(self, name):
+        profile = self._read_profile(name)
+        if profile is None:
+            print(f"Tilt profile not found: {name}")
+            return False
+        
+        self.calibration_profile = name
+        set_setting('tilt_profile', name)
+        self.calibration = TiltCalibration.from_dict(profile, self.sensitivity)
+        neutral = profile.get('neutral')
+        self._neutral = tuple(neutral) if neutral else None
+        set_setting('tilt_neutral', neutral)
+        self._rebuild_orientation_matrix()
+        self.tilt_filter.reset()
+        print(f"Tilt profile loaded: {name}")
+        return True
+
+    def _on_sensor_event(self, sensor_type, values, timestamp):
+        if sensor_type == SENSOR_TYPE_ACCELEROMETER:
+            x, y, z = float(values[0]), float(values[1]), float(values[2])
+            if self.sensor_backend == 'fusion':
+                self._fuse_accelerometer(x, y, z)
+            else:
+                self.update_values(x, y, z)
+        elif sensor_type == SENSOR_TYPE_GYROSCOPE:
+            self._fuse_gyroscope(float(values[0]), float(values[1]), float(values[2]), timestamp)
+        elif sensor_type == SENSOR_TYPE_GAME_ROTATION_VECTOR:
+            self._update_from_rotation_vector(values)
+
+    def _update_from_rotation_vector(self, values):
+        qx, qy, qz = float(values[0]), float(values[1]), float(values[2])
+        qw = float(values[3]) if len(values) > 3 else math.sqrt(max(0.0, 1.0 - qx * qx - qy * qy - qz * qz))
+        
+        # ردیف سوم ماتریس چرخش = جهت گرانش در مختصات دستگاه، بدون شتاب خطی
+        gx = 2.0 * (qx * qz - qw * qy)
+        gy = 2.0 * (qy * qz + qw * qx)
+        gz = 1.0 - 2.0 * (qx * qx + qy * qy)
+        self._update_steering(gx, gy, gz)
+
+    def _fuse_gyroscope(self, wx, wy, wz, timestamp):
+        if self._gyro_timestamp:
+            dt = (timestamp - self._gyro_timestamp) * 1e-9
+            if 0 < dt < 0.1:
+                # dg/dt = g × ω : گرانش در قاب دستگاه خلاف چرخش دستگاه می‌چرخد
+                gx, gy, gz = self._gravity
+                gx, gy, gz = (
+                    gx + (gy * wz - gz * wy) * dt,
+                    gy + (gz * wx - gx * wz) * dt,
+                    gz + (gx * wy - gy * wx) * dt,
+                )
+                g_norm = math.sqrt(gx * gx + gy * gy + gz * gz) or 1.0
+                self._gravity = [gx / g_norm, gy / g_norm, gz / g_norm]
+        self._gyro_timestamp = timestamp
+        self._update_steering(*self._gravity)
+
+    def _fuse_accelerometer(self, x, y, z):
+        self._last_values = [x, y, z]
+        norm = math.sqrt(x * x + y * y + z * z)
+        if norm < 1e-6:
+            return
+        
+        alpha = self.fusion_alpha
+        gx, gy, gz = self._gravity
+        gx = alpha * gx + (1.0 - alpha) * x / norm
+        gy = alpha * gy + (1.0 - alpha) * y / norm
+        gz = alpha * gz + (1.0 - alpha) * z / norm
+        g_norm = math.sqrt(gx * gx + gy * gy + gz * gz) or 1.0
+        self._gravity = [gx / g_norm, gy / g_norm, gz / g_norm]
 
     def update_values(self, x, y, z):
+        self._last_values = [x, y, z]
+        self._update_steering(x, y, z)
+
+    def _update_steering(self, x, y, z):
         if not self.is_active or self._stop_requested:
             return
             
-        self._last_values = [x, y, z]
         try:
-            x_adj, y_adj, z_adj = self.get_orientation_adjusted_values(x, y, z)
-            
-            tilt_angle = math.degrees(math.atan2(x_adj, math.sqrt(y_adj*y_adj + z_adj*z_adj)))
-            tilt_angle = -tilt_angle
-            tilt_angle *= self.sensitivity
-            
-            self.steering_angle = max(-90, min(90, tilt_angle * 2))
-            
-            # بررسی وجود کنترلر قبل از فراخوانی
-            if self.is_active and not self._stop_requested and self.controller:
-                try:
-                    self.controller.update_steering_from_accelerometer(self.steering_angle)
-                except Exception as controller_error:
-                    print(f"Controller callback error: {controller_error}")
+            self._last_gravity = (x, y, z)
+            m = self._orientation_matrix
+            x_adj = m[0] * x + m[1] * y + m[2] * z
+            y_adj = m[3] * x + m[4] * y + m[5] * z
+            z_adj = m[6] * x + m[7] * y + m[8] * z
+            
+            norm = math.sqrt(x_adj * x_adj + y_adj * y_adj + z_adj * z_adj)
+            if norm < 1e-6:
+                return
+            raw_angle = self.calibration.lookup(x_adj / norm)
+            
+            started = time.perf_counter()
+            now = time.monotonic()
+            self.steering_angle = self.tilt_filter.apply(raw_angle, now)
+            if abs(self.steering_angle) > self.tilt_filter.deadzone:
+                self.last_tilt_active = now
+            self.filter_cost_us += ((time.perf_counter() - started) * 1e6 - self.filter_cost_us) * 0.05
+            
+            self.samples_received += 1
+            if self._pending_angle is not None:
+                self.samples_dropped += 1
+            self._pending_angle = self.steering_angle
                     
         except Exception as e:
             print(f"Steering calculation error: {e}")
@@ -802,6 +1470,7 @@ class RealWiFiScanner:
                         action = intent.getAction()
                         if action == WiFiManager.SCAN_RESULTS_AVAILABLE_ACTION:
                             print("WiFi scan results available")
+                            self.scanner._results_received = True
                             
                             results = self.scanner.wifi_manager.getScanResults()
                             found_networks = []
@@ -898,6 +1567,7 @@ class RealWiFiScanner:
             PythonActivity = autoclass('org.kivy.android.PythonActivity')
             activity = PythonActivity.mActivity
             
+            self._results_received = False
             receiver = WiFiScanReceiver(self, callback)
             intent_filter = IntentFilter(WiFiManager.SCAN_RESULTS_AVAILABLE_ACTION)
             activity.registerReceiver(receiver, intent_filter)
@@ -913,7 +1583,7 @@ class RealWiFiScanner:
                     except:
                         pass
                     
-                    if not hasattr(self, '_results_received'):
+                    if not self._results_received:
                         Clock.schedule_once(lambda dt: callback([
                             "Scan timed out",
                             "No WiFi networks found",
@@ -933,6 +1603,168 @@ class RealWiFiScanner:
             Clock.schedule_once(lambda dt: callback([f"Scan error: {str(e)}"]))
             return [f"Error: {str(e)}"]
 
+CONNECT_PHASE_TIMEOUTS = {
+    'socket': 3.0,
+    'link': 12.0,
+    'tuning': 3.0,
+    'services': 6.0,
+}
+
+class ConnectAborted(Exception):
+    pass
+
+class ConnectFuture:
+    def __init__(self, address, timeouts=None):
+        self.address = address
+        self.timeouts = dict(CONNECT_PHASE_TIMEOUTS, **(timeouts or {}))
+        self.state = 'pending'
+        self.phase = None
+        self.error = None
+        self.started_at = time.monotonic()
+        self.elapsed_ms = None
+        self.phase_times = {}
+        self._phase_started = self.started_at
+        self._timer = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._cancel_hooks = []
+        self._done_callbacks = []
+        self._progress_callbacks = []
+
+    def enter_phase(self, phase):
+        self.check()
+        now = time.monotonic()
+        with self._lock:
+            if self.phase:
+                self.phase_times[self.phase] = round((now - self._phase_started) * 1000.0, 1)
+            self.phase = phase
+            self._phase_started = now
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.timeouts.get(phase, 10.0), self._expire, args=(phase,))
+            self._timer.daemon = True
+            self._timer.start()
+        
+        print(f"Connect {self.address}: {phase}")
+        for callback in self._progress_callbacks:
+            Clock.schedule_once(lambda dt, cb=callback: cb(self, phase))
+
+    def end_phase(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self.phase:
+                self.phase_times[self.phase] = round((time.monotonic() - self._phase_started) * 1000.0, 1)
+                self.phase = None
+
+    def _expire(self, phase):
+        if self.phase == phase:
+            self.fail(f"Timed out during {phase}")
+
+    def on_cancel(self, hook):
+        with self._lock:
+            if self.state == 'pending':
+                self._cancel_hooks.append(hook)
+                return
+        hook()
+
+    def add_progress_callback(self, callback):
+        self._progress_callbacks.append(callback)
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if self.state == 'pending':
+                self._done_callbacks.append(callback)
+                return
+        Clock.schedule_once(lambda dt: callback(self))
+
+    def cancel(self, reason="Cancelled"):
+        return self._abort('cancelled', reason)
+
+    def fail(self, reason):
+        return self._abort('failed', reason)
+
+    def _abort(self, state, reason):
+        with self._lock:
+            if self.state != 'pending':
+                return False
+            self.state = state
+            self.error = reason
+            hooks, self._cancel_hooks = self._cancel_hooks, []
+        
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Connect cancel hook error: {e}")
+        self._finish()
+        return True
+
+    def set_result(self, success, error=None):
+        with self._lock:
+            if self.state != 'pending':
+                return False
+            self.state = 'done' if success else 'failed'
+            self.error = error
+            self._cancel_hooks = []
+        self._finish()
+        return True
+
+    def _finish(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self.phase:
+                self.phase_times[self.phase] = round((now - self._phase_started) * 1000.0, 1)
+            self.elapsed_ms = round((now - self.started_at) * 1000.0, 1)
+            callbacks, self._done_callbacks = self._done_callbacks, []
+        
+        self._done.set()
+        print(f"Connect {self.address} {self.state} in {self.elapsed_ms:.0f} ms {self.phase_times}")
+        for callback in callbacks:
+            Clock.schedule_once(lambda dt, cb=callback: cb(self))
+
+    def check(self):
+        if self.state != 'pending':
+            raise ConnectAborted(self.error)
+
+    def wait_for(self, predicate, poll=0.05, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            self.check()
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            self._done.wait(poll)
+        self.check()
+        return True
+
+    @property
+    def cancelled(self):
+        return self.state == 'cancelled'
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        self._done.wait(timeout)
+        return self.state == 'done'
+
+SOCKET_PROFILES = {
+    'default': {},
+    'low_latency': {
+        'nodelay': True,
+        'sndbuf': 4096,
+        'keepalive': True,
+        'keepidle': 5,
+        'keepintvl': 2,
+        'keepcnt': 3,
+        'tos': 0xB8,
+    },
+}
+
 class SimpleWiFiManager:
     def __init__(self):
         self.connected = False
@@ -941,8 +1773,10 @@ class SimpleWiFiManager:
         self.socket = None
         self.host = ""
         self.port = 80
+        self.max_payload = 64
         self.battery_level = 85
-        self.battery_update_callback = None
+        self.telemetry = TelemetryDispatcher()
+        self._framer = None
         self.receive_thread = None
         self.should_receive = False
         self.last_communication_time = 0
@@ -951,6 +1785,9 @@ class SimpleWiFiManager:
         self._network_callback = None
         self._connectivity_manager = None
         self._current_network = None
+        self.socket_profile = 'default'
+        self.socket_options = {}
+        self.udp_control = None
         
         if HAS_ANDROID:
             self._initialize_android_components()
@@ -976,9 +1813,6 @@ class SimpleWiFiManager:
         print("Simple WiFi manager initialized")
         return True
     
-    def set_battery_callback(self, callback):
-        self.battery_update_callback = callback
-    
     def check_signal_strength(self):
         if not self.connected:
             return 0
@@ -1197,7 +2031,7 @@ class SimpleWiFiManager:
                     
                     # اتصال TCP به ربات
                     Clock.schedule_once(
-                        lambda dt: self.wifi_manager._connect_tcp_after_wifi(self.ip, self.port),
+                        lambda dt: self.wifi_manager.connect_manually(self.ip, self.port),
                         1.0  # کمی صبر کن
                     )
                 
@@ -1242,7 +2076,17 @@ class SimpleWiFiManager:
             # روش قدیمی را امتحان کن
             return self._connect_legacy(ssid, password, ip, port)
     
-    def _connect_tcp_after_wifi(self, ip, port):
+    def connect(self, device_address, future=None):
+        """اتصال مستقیم TCP به آدرس ip:port (بدون اسکن)"""
+        ip, _, port = device_address.partition(':')
+        return self._connect_tcp_after_wifi(ip.strip(), port.strip() or 80, future=future)
+    
+    def connect_manually(self, ip, port):
+        if self.main_app:
+            return self.main_app.connect_wifi(ip, port)
+        return self._connect_tcp_after_wifi(ip, port)
+    
+    def _connect_tcp_after_wifi(self, ip, port, socket_profile=None, future=None):
         """بعد از اتصال WiFi، به ربات TCP وصل شود"""
         try:
             print(f"Connecting TCP to {ip}:{port}...")
@@ -1255,9 +2099,22 @@ class SimpleWiFiManager:
             self.port = int(port)
             self.device_name = f"RC_Car_{ip}"
             
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(10)
-            self.socket.connect((self.host, self.port))
+            if socket_profile is None:
+                socket_profile = self._get_saved_socket_profile(ip, port)
+            
+            future = future or ConnectFuture(f"{ip}:{port}")
+            future.enter_phase('socket')
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            future.on_cancel(sock.close)
+            self.socket = sock
+            self.socket_profile = socket_profile
+            self.socket_options = self._apply_socket_profile(sock, socket_profile)
+            
+            future.enter_phase('link')
+            sock.settimeout(future.timeouts['link'])
+            sock.connect((self.host, self.port))
+            future.check()
+            future.end_phase()
             
             self.connected = True
             self.last_communication_time = time.time()
@@ -1266,6 +2123,9 @@ class SimpleWiFiManager:
             
             print(f"Connected to {ip}:{port}")
             
+            if get_setting('wifi_control_transport', 'tcp') == 'udp':
+                self._open_udp_control(ip)
+            
             # ذخیره در تاریخچه
             self._save_connection_to_history(ip, port)
             
@@ -1278,7 +2138,14 @@ class SimpleWiFiManager:
             
             return True
             
+        except ConnectAborted as e:
+            print(f"TCP connection aborted: {e}")
+            return False
         except Exception as e:
+            if future is not None and future.state != 'pending':
+                # سوکت توسط لغو/timeout بسته شده؛ خطای connect نتیجه همان است
+                print(f"TCP connection aborted: {future.error}")
+                return False
             print(f"TCP connection failed: {e}")
             if self.main_app:
                 self.main_app.show_connection_message(
@@ -1287,6 +2154,69 @@ class SimpleWiFiManager:
                 )
             return False
     
+    def _get_saved_socket_profile(self, ip, port):
+        default_profile = get_setting('wifi_socket_profile', 'low_latency')
+        try:
+            app = App.get_running_app()
+            if hasattr(app, 'settings_manager'):
+                for conn in app.settings_manager.get_saved_wifi_connections():
+                    if conn.get("ip") == ip and conn.get("port") == int(port):
+                        return conn.get("socket_profile", default_profile)
+        except Exception as e:
+            print(f"Could not read saved socket profile: {e}")
+        return default_profile
+    
+    def _apply_socket_profile(self, sock, profile_name):
+        """اعمال تنظیمات سوکت بر اساس پروفایل انتخاب شده"""
+        profile = SOCKET_PROFILES.get(profile_name, SOCKET_PROFILES['default'])
+        applied = {}
+        
+        options = [
+            ('nodelay', socket.IPPROTO_TCP, 'TCP_NODELAY', lambda v: 1 if v else 0),
+            ('sndbuf', socket.SOL_SOCKET, 'SO_SNDBUF', int),
+            ('keepalive', socket.SOL_SOCKET, 'SO_KEEPALIVE', lambda v: 1 if v else 0),
+            ('keepidle', socket.IPPROTO_TCP, 'TCP_KEEPIDLE', int),
+            ('keepintvl', socket.IPPROTO_TCP, 'TCP_KEEPINTVL', int),
+            ('keepcnt', socket.IPPROTO_TCP, 'TCP_KEEPCNT', int),
+            ('tos', socket.IPPROTO_IP, 'IP_TOS', int),
+        ]
+        
+        for key, level, opt_name, convert in options:
+            if key not in profile:
+                continue
+            opt = getattr(socket, opt_name, None)
+            if opt is None:
+                print(f"Socket option {opt_name} not supported on this platform")
+                continue
+            try:
+                sock.setsockopt(level, opt, convert(profile[key]))
+                applied[key] = sock.getsockopt(level, opt)
+            except Exception as e:
+                print(f"Could not set {opt_name}: {e}")
+        
+        print(f"Socket profile '{profile_name}' applied: {applied}")
+        return applied
+    
+    def _open_udp_control(self, ip):
+        udp_port = get_setting('wifi_udp_port', 4210)
+        # یک ترنسپورت در طول اتصال‌های مجدد؛ شماره ترتیب از همان‌جا ادامه می‌یابد
+        if self.udp_control is None:
+            self.udp_control = UDPControlTransport()
+        tos = SOCKET_PROFILES.get(self.socket_profile, {}).get('tos')
+        if not self.udp_control.connect(ip, udp_port, tos=tos):
+            print("UDP control unavailable - control commands stay on TCP")
+    
+    def get_diagnostics(self):
+        return {
+            'transport': 'wifi',
+            'host': self.host,
+            'port': self.port,
+            'connected': self.connected,
+            'socket_profile': self.socket_profile,
+            'socket_options': dict(self.socket_options),
+            'udp_control': self.udp_control.get_diagnostics() if self.udp_control else None,
+        }
+    
     def _connect_legacy(self, ssid, password, ip, port):
         """روش قدیمی برای اندرویدهای قدیمی"""
         print(f"Using legacy method for SSID: {ssid}")
@@ -1341,34 +2271,36 @@ class SimpleWiFiManager:
                 app.settings_manager.add_saved_wifi_connection(
                     ip=ip,
                     port=port,
-                    connection_name=self.device_name
+                    connection_name=self.device_name,
+                    socket_profile=self.socket_profile
                 )
                 print(f"Connection saved to history: {ip}:{port}")
         except Exception as e:
             print(f"Could not save connection to history: {e}")
     
+    def _on_control_byte(self, control):
+        if control == PROTOCOL_BINARY_ACK and self.main_app:
+            self.main_app.on_binary_protocol_ack()
+
+    def expect_control_byte(self, control, timeout):
+        if self._framer:
+            self._framer.expect_control_byte(control, timeout)
+    
     def _start_receive_thread(self):
+        framer = self._framer = LineFramer(on_control_byte=self._on_control_byte)
+        
         def receive_loop():
             try:
+                self.socket.settimeout(0.5)
                 while self.should_receive and self.connected and self.socket:
                     try:
-                        self.socket.settimeout(0.5)
-                        data = self.socket.recv(1024)
-                        if data:
-                            message = data.decode('utf-8').strip()
-                            print(f"WiFi: {message}")
+                        count = self.socket.recv_into(framer.writable())
+                        if count:
+                            framer.commit(count)
                             self.last_communication_time = time.time()
                             
-                            if "BAT" in message or "battery" in message.lower():
-                                try:
-                                    numbers = [int(s) for s in message.split() if s.isdigit()]
-                                    if numbers:
-                                        level = max(0, min(100, numbers[0]))
-                                        self.battery_level = level
-                                        if self.battery_update_callback:
-                                            Clock.schedule_once(lambda dt: self.battery_update_callback(level))
-                                except:
-                                    pass
+                            for line in framer.messages():
+                                self.telemetry.dispatch(line)
                                     
                     except socket.timeout:
                         continue
@@ -1395,16 +2327,27 @@ class SimpleWiFiManager:
         if not self.connected:
             print(f"[WiFi NOT CONNECTED] {command}")
             return False
+        
+        if self.udp_control and self.udp_control.connected and command_channel(command):
+            return self.udp_control.send_command(command)
+            
+        if self.send_raw((command + '\n').encode('utf-8')):
+            print(f"WiFi Command: {command}")
+            return True
+        return False
+    
+    def send_control_raw(self, data, key=None):
+        if self.connected and self.udp_control and self.udp_control.connected:
+            return self.udp_control.send_raw(data)
+        return self.send_raw(data)
+    
+    def send_raw(self, data):
+        if not self.connected or not self.socket:
+            return False
             
         try:
-            if not self.socket:
-                return False
-                
-            data = (command + '\n').encode('utf-8')
             self.socket.sendall(data)
             self.last_communication_time = time.time()
-            
-            print(f"WiFi Command: {command}")
             return True
             
         except Exception as e:
@@ -1416,6 +2359,9 @@ class SimpleWiFiManager:
             self.connected = False
             self.should_receive = False
             
+            if self.udp_control:
+                self.udp_control.disconnect()
+            
             # قطع اتصال TCP
             if self.socket:
                 self.socket.close()
@@ -1434,21 +2380,259 @@ class SimpleWiFiManager:
         except Exception as e:
             print(f"WiFi disconnect error: {e}")
 
+class UDPControlTransport:
+    """دیتاگرام‌های کنترلی با شماره ترتیب ۳۲ بیتی.
+
+    قاعده سمت ماشین: دیتاگرام فقط وقتی پذیرفته شود که (seq - last_seq) mod 2**32
+    بین 1 و 2**31 باشد. SimpleWiFiManager یک نمونه را در تمام اتصال‌های مجدد نگه می‌دارد،
+    پس شمارنده برای همان میزبان فقط جلو می‌رود. فقط برای میزبان جدید یا اجرای جدید
+    برنامه از زمان (میلی‌ثانیه) شروع می‌شود؛ اگر ساعت گوشی بین دو اجرا عقب برود، ماشین
+    باید last_seq را با قطع TCP یا ری‌استارت فراموش کند.
+    """
+    HEADER = struct.Struct('>I')
+
+    @staticmethod
+    def _initial_seq():
+        return int(time.time() * 1000) & 0xFFFFFFFF
+
+    def __init__(self):
+        self.socket = None
+        self.host = ""
+        self.port = 0
+        self.connected = False
+        self.max_payload = 64
+        self._seq = self._initial_seq()
+        self._buffer = bytearray(self.HEADER.size + 512)
+        self._view = memoryview(self._buffer)
+        self.sent_count = 0
+        self.failed_count = 0
+
+    def connect(self, host, port, tos=None):
+        try:
+            self.disconnect()
+            if (host, int(port)) != (self.host, self.port):
+                self._seq = self._initial_seq()
+            self.host = host
+            self.port = int(port)
+            
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if tos is not None and hasattr(socket, 'IP_TOS'):
+                try:
+                    self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, tos)
+                except Exception as e:
+                    print(f"Could not set UDP IP_TOS: {e}")
+            self.socket.connect((self.host, self.port))
+            
+            self.connected = True
+            print(f"UDP control channel ready: {self.host}:{self.port}")
+            return True
+            
+        except Exception as e:
+            print(f"UDP control connect error: {e}")
+            self.disconnect()
+            return False
+
+    def send_command(self, command):
+        return self.send_raw((command + '\n').encode('utf-8'))
+
+    def send_raw(self, data):
+        if not self.connected or not self.socket:
+            return False
+        
+        size = len(data)
+        if size > len(self._buffer) - self.HEADER.size:
+            print(f"UDP control payload too large: {size} bytes")
+            return False
+            
+        try:
+            self.HEADER.pack_into(self._buffer, 0, self._seq)
+            end = self.HEADER.size + size
+            self._view[self.HEADER.size:end] = data
+            self.socket.send(self._view[:end])
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            self.sent_count += 1
+            return True
+            
+        except Exception as e:
+            self.failed_count += 1
+            print(f"UDP control send error: {e}")
+            return False
+
+    def disconnect(self):
+        self.connected = False
+        if self.socket:
+            try:
+                self.socket.close()
+            except Exception as e:
+                print(f"UDP control close error: {e}")
+            self.socket = None
+
+    def get_diagnostics(self):
+        return {
+            'host': self.host,
+            'port': self.port,
+            'connected': self.connected,
+            'next_seq': self._seq,
+            'sent': self.sent_count,
+            'failed': self.failed_count,
+        }
+
+DEVICE_ADDRESS_PATTERN = re.compile(r'\(([0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5})\)')
+
+SCAN_CACHE_TTL = {
+    'ble': 30.0,
+    'classic': 120.0,
+    'wifi': 60.0,
+}
+
+def device_address_key(entry):
+    match = DEVICE_ADDRESS_PATTERN.search(str(entry))
+    return match.group(1).upper() if match else None
+
+def scan_result_has_devices(devices):
+    return any(device_address_key(d) or str(d).startswith(('RC Car: ', 'WiFi: ')) for d in devices)
+
+class ScanCache:
+    def __init__(self, ttl=None):
+        self.ttl = dict(SCAN_CACHE_TTL, **(ttl or {}))
+        self._entries = {}
+
+    def put(self, transport, devices):
+        self._entries[transport] = (time.monotonic(), list(devices))
+
+    def get(self, transport):
+        entry = self._entries.get(transport)
+        return list(entry[1]) if entry else None
+
+    def age(self, transport):
+        entry = self._entries.get(transport)
+        return time.monotonic() - entry[0] if entry else None
+
+    def is_fresh(self, transport):
+        age = self.age(transport)
+        return age is not None and age < self.ttl.get(transport, 30.0)
+
+    def invalidate(self, transport=None):
+        if transport is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(transport, None)
+
+    @staticmethod
+    def merge_stale(devices, cached):
+        """دستگاه‌های کش‌شده‌ای که هنوز در اسکن جدید دیده نشده‌اند در انتهای لیست می‌مانند"""
+        if not cached:
+            return devices
+        seen = {device_address_key(d) for d in devices}
+        stale = [d for d in cached if device_address_key(d) and device_address_key(d) not in seen]
+        return list(devices) + stale
+
+SCAN_RSSI_BUCKET_DB = 10
+SCAN_RSSI_HYSTERESIS_DB = 3
+
+class ScanResultSet:
+    """نتایج اسکن BLE؛ ترتیب فقط با عوض شدن دسته RSSI (۱۰ dB با هیسترزیس) تغییر می‌کند
+    و در یک دسته به ترتیب پیدا شدن می‌ماند، تا ردیف‌ها زیر انگشت کاربر جابه‌جا نشوند"""
+
+    def __init__(self, name_prefixes=(), alpha=0.3):
+        self.name_prefixes = tuple(p.lower() for p in name_prefixes if p)
+        self.alpha = alpha
+        self.devices = {}
+        self.results_seen = 0
+        self.filtered = 0
+
+    def accepts(self, name):
+        if not self.name_prefixes:
+            return True
+        return bool(name) and name.lower().startswith(self.name_prefixes)
+
+    def update(self, address, name, rssi):
+        self.results_seen += 1
+        if not self.accepts(name):
+            self.filtered += 1
+            return False
+        
+        entry = self.devices.get(address)
+        if entry is None:
+            self.devices[address] = {'name': name, 'rssi': float(rssi), 'seen': 1,
+                                     'bucket': int(rssi // SCAN_RSSI_BUCKET_DB)}
+            return True
+        
+        entry['seen'] += 1
+        entry['rssi'] += self.alpha * (rssi - entry['rssi'])
+        low = entry['bucket'] * SCAN_RSSI_BUCKET_DB - SCAN_RSSI_HYSTERESIS_DB
+        if not low <= entry['rssi'] < low + SCAN_RSSI_BUCKET_DB + 2 * SCAN_RSSI_HYSTERESIS_DB:
+            entry['bucket'] = int(entry['rssi'] // SCAN_RSSI_BUCKET_DB)
+        if name and not entry['name']:
+            entry['name'] = name
+        return True
+
+    def ranked(self):
+        # sorted پایدار است؛ در یک دسته ترتیب درج dict حفظ می‌شود
+        ordered = sorted(self.devices.items(), key=lambda item: item[1]['bucket'], reverse=True)
+        return [
+            f"{entry['name'] or 'Unknown Device'} ({address}) - {entry['rssi']:.0f}dBm"
+            for address, entry in ordered
+        ]
+
+GATT_PROP_WRITE_NO_RESPONSE = 0x04
+GATT_PROP_WRITE = 0x08
+GATT_WRITE_TYPE_NO_RESPONSE = 1
+GATT_WRITE_TYPE_DEFAULT = 2
+GATT_MAX_MTU = 517
+GATT_ATT_HEADER = 3
+
+CONNECTION_PRIORITY_BALANCED = 0
+CONNECTION_PRIORITY_HIGH = 1
+CONNECTION_PRIORITY_NAMES = {
+    CONNECTION_PRIORITY_BALANCED: 'balanced',
+    CONNECTION_PRIORITY_HIGH: 'high',
+}
+
 class AndroidBLE:
     def __init__(self):
         self.connected = False
         self.device_name = ""
         self.main_app = None
         self.battery_level = 85
-        self.battery_update_callback = None
+        self.telemetry = TelemetryDispatcher()
         self.ble_devices = []
         self.scan_callback = None
         self.gatt = None
         self.characteristics = {}
+        self.max_payload = 20
+        self.write_failures = 0
+        self.write_props = 0
+        self.mtu = 23
+        self._mtu_negotiated = False
+        self.connection_priority = None
+        self.priority_changes = 0
+        self.device_address = ""
+        self.gatt_cache_size = 16
+        self.gatt_cache_hits = 0
+        self.gatt_cache_misses = 0
+        self._connect_future = None
+        self._gatt_ops = deque()
+        self._gatt_lock = threading.Lock()
+        self._gatt_busy = False
+        self._gatt_inflight = None
+        self._gatt_op_started = 0.0
+        self.gatt_op_timeout = 1.0
+        # discovery چند ثانیه طول می‌کشد؛ بقیه عملیات‌ها با gatt_op_timeout
+        self.gatt_op_timeouts = {'discover': CONNECT_PHASE_TIMEOUTS['services'], 'mtu': 2.0}
+        self._gatt_watchdog = None
+        self.gatt_queue_max = 32
+        self.gatt_ops_completed = 0
+        self.gatt_ops_dropped = 0
+        self.gatt_ops_coalesced = 0
+        self.gatt_ops_timed_out = 0
+        self.gatt_writes = 0
+        self._framer = LineFramer(on_control_byte=self._on_control_byte)
         self.last_communication_time = 0
         self.signal_check_interval = 5
         self._scanning = False
         self._scan_cb_obj = None
+        self.scan_results = None
         self._adapter = None
         self._scanner = None
         
@@ -1488,6 +2672,7 @@ class AndroidBLE:
                 Clock.schedule_once(lambda dt: callback(["Bluetooth is disabled - please enable Bluetooth"]))
                 return ["Bluetooth disabled"]
             
+            self.stop_scan()
             self._scanner = self._adapter.getBluetoothLeScanner()
             if not self._scanner:
                 Clock.schedule_once(lambda dt: callback(["BLE scanner not available"]))
@@ -1495,30 +2680,28 @@ class AndroidBLE:
             
             from jnius import PythonJavaClass, java_method
             
+            results = ScanResultSet(get_setting('ble_scan_name_prefixes', []))
+            self.scan_results = results
+            
+            def push_results(dt):
+                if self.scan_results is results and results.devices:
+                    callback(results.ranked())
+            
+            push_trigger = Clock.create_trigger(push_results, 0.15)
+            
             class ScanCallback(PythonJavaClass):
                 __javainterfaces__ = ['android/bluetooth/le/ScanCallback']
                 
                 def __init__(self, outer):
                     super().__init__()
                     self.outer = outer
-                    self.found_devices = []
 
                 @java_method('(ILandroid/bluetooth/le/ScanResult;)V')
                 def onScanResult(self, callbackType, result):
                     try:
                         device = result.getDevice()
-                        name = device.getName()
-                        address = device.getAddress()
-                        rssi = result.getRssi()
-                        
-                        if name:
-                            device_info = f"{name} ({address}) - {rssi}dBm"
-                        else:
-                            device_info = f"Unknown Device ({address}) - {rssi}dBm"
-                            
-                        if device_info not in self.found_devices:
-                            self.found_devices.append(device_info)
-                            print(f"Found BLE device: {device_info}")
+                        if results.update(device.getAddress(), device.getName(), result.getRssi()):
+                            push_trigger()
                                 
                     except Exception as e:
                         print(f"BLE scan result error: {e}")
@@ -1545,23 +2728,36 @@ class AndroidBLE:
             builder.setScanMode(ScanSettings.SCAN_MODE_LOW_LATENCY)
             scan_settings = builder.build()
             
-            self._scanner.startScan(None, scan_settings, scan_callback)
+            # فیلتر UUID سرویس در خود کنترلر بلوتوث اعمال می‌شود
+            scan_filters = None
+            service_uuids = get_setting('ble_scan_service_uuids', [])
+            if service_uuids:
+                ArrayList = autoclass('java.util.ArrayList')
+                ScanFilterBuilder = autoclass('android.bluetooth.le.ScanFilter$Builder')
+                ParcelUuid = autoclass('android.os.ParcelUuid')
+                scan_filters = ArrayList()
+                for uuid in service_uuids:
+                    scan_filters.add(ScanFilterBuilder().setServiceUuid(ParcelUuid.fromString(uuid)).build())
+            
+            self._scanner.startScan(scan_filters, scan_settings, scan_callback)
+            self._scanning = True
             print("BLE scan started")
             
             def stop_scan(dt):
+                if self.scan_results is not results:
+                    return
                 try:
-                    if self._scanner and self._scan_cb_obj:
-                        self._scanner.stopScan(self._scan_cb_obj)
-                    devices = getattr(scan_callback, 'found_devices', [])
+                    self.stop_scan()
+                    devices = results.ranked()
                     
                     if not devices:
                         devices = ["No BLE devices found - Make sure devices are discoverable"]
                         
-                    print(f"BLE scan completed: {len(devices)} devices found")
-                    Clock.schedule_once(lambda dt: callback(devices))
+                    print(f"BLE scan completed: {len(results.devices)} devices from {results.results_seen} results ({results.filtered} filtered)")
+                    callback(devices)
                 except Exception as e:
                     print(f"Error stopping BLE scan: {e}")
-                    Clock.schedule_once(lambda dt: callback([f"Scan error: {str(e)}"]))
+                    callback([f"Scan error: {str(e)}"])
             
             Clock.schedule_once(stop_scan, duration)
             return ["BLE scan started..."]
@@ -1571,9 +2767,20 @@ class AndroidBLE:
             Clock.schedule_once(lambda dt: callback([f"BLE scan error: {str(e)}"]))
             return [f"BLE scan error: {str(e)}"]
 
-    def connect(self, device_address):
+    def stop_scan(self):
+        if not self._scanning:
+            return
+        try:
+            if self._scanner and self._scan_cb_obj:
+                self._scanner.stopScan(self._scan_cb_obj)
+        except Exception as e:
+            print(f"Error stopping BLE scan: {e}")
+        self._scanning = False
+
+    def connect(self, device_address, future=None):
         try:
             print(f"BLE connect to: {device_address}")
+            self.stop_scan()
             if not HAS_ANDROID:
                 print("BLE not available on desktop")
                 return False
@@ -1584,6 +2791,7 @@ class AndroidBLE:
             else:
                 address = device_address
                 self.device_name = "BLE Device"
+            self.device_address = address
             
             device = self._adapter.getRemoteDevice(address)
             if not device:
@@ -1608,14 +2816,14 @@ class AndroidBLE:
                             self.outer.last_communication_time = time.time()
                             print("BLE Connected")
                             
-                            gatt.discoverServices()
-                            
                             if self.outer.main_app:
                                 Clock.schedule_once(lambda dt: setattr(self.outer.main_app, 'connection_status', 'Connected (BLE)'))
                                 
                         elif newState == BluetoothProfile.STATE_DISCONNECTED:
                             self.outer.connected = False
                             print("BLE Disconnected")
+                            if self.outer._connect_future:
+                                self.outer._connect_future.fail(f"GATT disconnected (status {status})")
                             if self.outer.main_app:
                                 Clock.schedule_once(lambda dt: self.outer.main_app.on_signal_lost())
                     except Exception as e:
@@ -1630,14 +2838,43 @@ class AndroidBLE:
                             print(f"Service discovery failed: {status}")
                     except Exception as e:
                         print(f"onServicesDiscovered error: {e}")
+                    finally:
+                        self.outer._on_gatt_op_complete('discover')
 
-                def onCharacteristicRead(self, gatt, characteristic, status):
+                def onMtuChanged(self, gatt, mtu, status):
                     try:
                         if status == BluetoothGatt.GATT_SUCCESS:
-                            val = characteristic.getValue()
-                            if val:
-                                data = ''.join([chr(b) for b in val])
-                                self.outer.last_communication_time = time.time()
+                            self.outer.mtu = mtu
+                            self.outer.max_payload = mtu - GATT_ATT_HEADER
+                            print(f"BLE MTU negotiated: {mtu}")
+                        else:
+                            print(f"BLE MTU request failed: {status}")
+                        self.outer._mtu_negotiated = True
+                    finally:
+                        self.outer._on_gatt_op_complete('mtu')
+
+                def onCharacteristicWrite(self, gatt, characteristic, status):
+                    try:
+                        if status != BluetoothGatt.GATT_SUCCESS:
+                            self.outer.write_failures += 1
+                            print(f"BLE write failed: {status}")
+                    finally:
+                        self.outer._on_gatt_op_complete('write')
+
+                def onDescriptorWrite(self, gatt, descriptor, status):
+                    try:
+                        if status != BluetoothGatt.GATT_SUCCESS:
+                            print(f"BLE descriptor write failed: {status}")
+                    finally:
+                        self.outer._on_gatt_op_complete('descriptor')
+
+                def onCharacteristicRead(self, gatt, characteristic, status):
+                    try:
+                        if status == BluetoothGatt.GATT_SUCCESS:
+                            val = characteristic.getValue()
+                            if val:
+                                data = ''.join([chr(b) for b in val])
+                                self.outer.last_communication_time = time.time()
                                 print(f"BLE Read: {data}")
                     except Exception as e:
                         print(f"onCharacteristicRead error: {e}")
@@ -1646,42 +2883,132 @@ class AndroidBLE:
                     try:
                         val = characteristic.getValue()
                         if val:
-                            data = ''.join([chr(b) for b in val])
                             self.outer.last_communication_time = time.time()
-                            print(f"BLE Notification: {data}")
                             
-                            if "BAT" in data or "battery" in data.lower():
-                                try:
-                                    numbers = [int(s) for s in data.split() if s.isdigit()]
-                                    if numbers:
-                                        level = max(0, min(100, numbers[0]))
-                                        self.outer.battery_level = level
-                                        if self.outer.battery_update_callback:
-                                            Clock.schedule_once(lambda dt: self.outer.battery_update_callback(level))
-                                except:
-                                    pass
+                            for line in self.outer._framer.feed(bytes(b & 0xFF for b in val), packet=True):
+                                self.outer.telemetry.dispatch(line)
                     except Exception as e:
                         print(f"onCharacteristicChanged error: {e}")
 
+            future = future or ConnectFuture(device_address)
+            self._connect_future = future
+            self._framer.reset()
+            self._reset_gatt_ops()
+            self.characteristics = {}
+            self.write_props = 0
+            self.mtu = 23
+            self.max_payload = 20
+            self._mtu_negotiated = False
+            self.connection_priority = None
             self.gatt_callback = GattCallback(self)
-            self.gatt = device.connectGatt(PythonActivity.mActivity, False, self.gatt_callback)
-            
-            def check_connection(dt):
-                if self.connected:
-                    if self.main_app:
-                        self.main_app.connected_device = f"Connected: {self.device_name}"
-                        self.main_app.connection_status = "Connected (BLE)"
-                    return False
-                return True
             
-            Clock.schedule_interval(check_connection, 0.5)
+            future.enter_phase('link')
+            gatt = device.connectGatt(PythonActivity.mActivity, False, self.gatt_callback)
+            self.gatt = gatt
+            future.on_cancel(gatt.close)
+            self._start_gatt_watchdog()
+            future.wait_for(lambda: self.connected)
+            
+            # اولویت بالا برای کوتاه کردن interval هنگام discovery و رانندگی
+            future.enter_phase('tuning')
+            self.set_connection_priority(CONNECTION_PRIORITY_HIGH)
+            self._submit_gatt_op(('mtu', GATT_MAX_MTU))
+            if not future.wait_for(lambda: self._mtu_negotiated, timeout=1.5):
+                print("BLE MTU negotiation timed out - keeping default MTU")
+                self._abandon_gatt_op('mtu')
+            
+            future.enter_phase('services')
+            self._submit_gatt_op(('discover',))
+            future.wait_for(lambda: 'write' in self.characteristics)
+            future.end_phase()
             return True
             
+        except ConnectAborted as e:
+            print(f"BLE connect aborted: {e}")
+            self.connected = False
+            return False
         except Exception as e:
             print(f"BLE connect error: {e}")
             return False
 
+    def _on_control_byte(self, control):
+        if control == PROTOCOL_BINARY_ACK and self.main_app:
+            self.main_app.on_binary_protocol_ack()
+
+    def expect_control_byte(self, control, timeout):
+        if self._framer:
+            self._framer.expect_control_byte(control, timeout)
+
     def _discover_characteristics(self, gatt):
+        if self._restore_cached_characteristics(gatt):
+            return
+        
+        self._walk_characteristics(gatt)
+        if 'write' in self.characteristics:
+            self._store_gatt_cache()
+
+    def _restore_cached_characteristics(self, gatt):
+        """بازیابی مستقیم مشخصه‌ها از کش به جای پیمایش کامل سرویس‌ها"""
+        entry = get_setting('gatt_cache', {}).get(self.device_address)
+        if not entry or 'write' not in entry:
+            self.gatt_cache_misses += 1
+            return False
+        
+        try:
+            UUID = autoclass('java.util.UUID')
+            resolved = {}
+            for role, (service_uuid, char_uuid) in entry.items():
+                service = gatt.getService(UUID.fromString(service_uuid))
+                char = service.getCharacteristic(UUID.fromString(char_uuid)) if service else None
+                if char is None:
+                    raise LookupError(f"{role} characteristic {char_uuid} not found")
+                resolved[role] = char
+        except Exception as e:
+            print(f"GATT cache lookup failed for {self.device_address}: {e} - running full discovery")
+            self.gatt_cache_misses += 1
+            self._forget_gatt_cache()
+            return False
+        
+        if 'notify' in resolved:
+            self._enable_notifications(gatt, resolved['notify'])
+        self.write_props = resolved['write'].getProperties()
+        self.characteristics = resolved
+        self.gatt_cache_hits += 1
+        print(f"GATT map restored from cache for {self.device_address}")
+        return True
+
+    def _store_gatt_cache(self):
+        try:
+            entry = {}
+            for role, char in self.characteristics.items():
+                entry[role] = [char.getService().getUuid().toString(), char.getUuid().toString()]
+            
+            cache = dict(get_setting('gatt_cache', {}))
+            cache.pop(self.device_address, None)
+            cache[self.device_address] = entry
+            while len(cache) > self.gatt_cache_size:
+                cache.pop(next(iter(cache)))
+            set_setting('gatt_cache', cache)
+        except Exception as e:
+            print(f"Could not store GATT cache: {e}")
+
+    def _forget_gatt_cache(self):
+        cache = dict(get_setting('gatt_cache', {}))
+        if cache.pop(self.device_address, None) is not None:
+            set_setting('gatt_cache', cache)
+
+    def _enable_notifications(self, gatt, char):
+        gatt.setCharacteristicNotification(char, True)
+        
+        descriptors = char.getDescriptors()
+        for k in range(descriptors.size()):
+            desc = descriptors.get(k)
+            desc_uuid = desc.getUuid().toString().lower()
+            if "2902" in desc_uuid:
+                self._submit_gatt_op(('descriptor', desc, [0x01, 0x00]))
+                print(f"Enabled notifications")
+
+    def _walk_characteristics(self, gatt):
         try:
             services = gatt.getServices()
             print(f"Discovering characteristics for {services.size()} services...")
@@ -1698,22 +3025,15 @@ class AndroidBLE:
                     uuid = char.getUuid().toString()
                     print(f"Characteristic: {uuid}, Properties: {props}")
                     
-                    if props & 0x08 or props & 0x04:
-                        self.characteristics['write'] = char
-                        print(f"Found WRITE characteristic")
+                    if props & (GATT_PROP_WRITE | GATT_PROP_WRITE_NO_RESPONSE):
+                        # مشخصه‌ای که write بدون پاسخ دارد برای ترافیک کنترلی ترجیح داده می‌شود
+                        if 'write' not in self.characteristics or (props & GATT_PROP_WRITE_NO_RESPONSE and not self.write_props & GATT_PROP_WRITE_NO_RESPONSE):
+                            self.characteristics['write'] = char
+                            self.write_props = props
+                            print(f"Found WRITE characteristic")
                     
                     if props & 0x10 or props & 0x20:
-                        gatt.setCharacteristicNotification(char, True)
-                        
-                        descriptors = char.getDescriptors()
-                        for k in range(descriptors.size()):
-                            desc = descriptors.get(k)
-                            desc_uuid = desc.getUuid().toString().lower()
-                            if "2902" in desc_uuid:
-                                desc.setValue([0x01, 0x00])
-                                gatt.writeDescriptor(desc)
-                                print(f"Enabled notifications")
-                        
+                        self._enable_notifications(gatt, char)
                         self.characteristics['notify'] = char
                         print(f"Found NOTIFY characteristic")
                     
@@ -1735,28 +3055,203 @@ class AndroidBLE:
             print(f"[BLE NOT CONNECTED] {command}")
             return False
             
+        channel = command_channel(command)
+        success = self._write((command + '\n').encode('utf-8'), control=bool(channel), key=channel)
+        if success:
+            print(f"BLE Command sent: {command}")
+        else:
+            print(f"BLE Command failed: {command}")
+        return success
+
+    def send_raw(self, data):
+        return self._write(data)
+
+    def send_control_raw(self, data, key=None):
+        return self._write(data, control=True, key=key)
+
+    def _write(self, data, control=False, key=None):
+        if not self.connected or not HAS_ANDROID:
+            return False
+            
+        if not self.gatt or 'write' not in self.characteristics:
+            print("[BLE NO WRITE CHARACTERISTIC]")
+            return False
+        
+        if control and self.write_props & GATT_PROP_WRITE_NO_RESPONSE:
+            write_type = GATT_WRITE_TYPE_NO_RESPONSE
+        elif self.write_props & GATT_PROP_WRITE:
+            write_type = GATT_WRITE_TYPE_DEFAULT
+        else:
+            write_type = GATT_WRITE_TYPE_NO_RESPONSE
+        
+        # data ممکن است memoryview روی بافر مشترک باشد، پس کپی می‌شود
+        # کلید فقط برای نوشتن‌های کنترلی است: نسخه جدید جای نسخه منتظر در صف را می‌گیرد
+        coalesce_key = (key or 'control') if control else None
+        return self._submit_gatt_op(('write', self.characteristics['write'], bytes(data), write_type, coalesce_key))
+
+    def set_connection_priority(self, priority):
+        if not self.gatt or priority == self.connection_priority:
+            return False
         try:
-            if not self.gatt or 'write' not in self.characteristics:
-                print("[BLE NO WRITE CHARACTERISTIC]")
-                return False
-                
-            char = self.characteristics['write']
-            data = (command + '\n').encode('utf-8')
-            char.setValue(data)
-            success = self.gatt.writeCharacteristic(char)
+            if self.gatt.requestConnectionPriority(priority):
+                self.connection_priority = priority
+                self.priority_changes += 1
+                print(f"BLE connection priority: {CONNECTION_PRIORITY_NAMES.get(priority, priority)}")
+                return True
+        except Exception as e:
+            print(f"BLE connection priority error: {e}")
+        return False
+
+    def _reset_gatt_ops(self):
+        with self._gatt_lock:
+            self._gatt_ops.clear()
+            self._gatt_busy = False
+            self._gatt_inflight = None
+
+    def _submit_gatt_op(self, op):
+        """Android فقط یک عملیات GATT همزمان را می‌پذیرد؛ بقیه در صف می‌مانند"""
+        with self._gatt_lock:
+            self._expire_gatt_op_locked()
             
-            if success:
-                self.last_communication_time = time.time()
-                print(f"BLE Command sent: {command}")
+            queued = self._gatt_busy or bool(self._gatt_ops)
+            if queued:
+                accepted = self._enqueue_gatt_op(op)
             else:
-                print(f"BLE Command failed: {command}")
-                
-            return success
+                self._gatt_busy = True
+                self._gatt_inflight = op[0]
+                self._gatt_op_started = time.monotonic()
+        
+        if queued:
+            self._pump_gatt_ops()
+            return accepted
+        return self._run_gatt_op(op)
+
+    def _expire_gatt_op_locked(self):
+        if not self._gatt_busy:
+            return False
+        timeout = self.gatt_op_timeouts.get(self._gatt_inflight, self.gatt_op_timeout)
+        if time.monotonic() - self._gatt_op_started <= timeout:
+            return False
+        
+        print(f"GATT {self._gatt_inflight} timed out - continuing with the queue")
+        self.gatt_ops_timed_out += 1
+        self._gatt_busy = False
+        self._gatt_inflight = None
+        return True
+
+    def _check_gatt_timeout(self, dt=None):
+        # callback گم‌شده بدون رسیدن عملیات جدید هم صف را آزاد می‌کند
+        with self._gatt_lock:
+            expired = self._expire_gatt_op_locked()
+        if expired:
+            self._pump_gatt_ops()
+
+    def _start_gatt_watchdog(self):
+        self._stop_gatt_watchdog()
+        self._gatt_watchdog = Clock.schedule_interval(self._check_gatt_timeout, self.gatt_op_timeout / 2.0)
+
+    def _stop_gatt_watchdog(self):
+        if self._gatt_watchdog:
+            self._gatt_watchdog.cancel()
+            self._gatt_watchdog = None
+
+    def _enqueue_gatt_op(self, op):
+        """با قفل صدا زده می‌شود. نوشتن‌های کنترلی با کلید یکسان ادغام می‌شوند و
+        در صف پر فقط قدیمی‌ترین نوشتن کنترلی حذف می‌شود؛ دستورات دیگر و descriptor هرگز"""
+        key = op[4] if op[0] == 'write' else None
+        if key is not None:
+            for i, pending in enumerate(self._gatt_ops):
+                if pending[0] == 'write' and pending[4] == key:
+                    self._gatt_ops[i] = op
+                    self.gatt_ops_coalesced += 1
+                    return True
+        
+        if len(self._gatt_ops) >= self.gatt_queue_max:
+            victim = next((pending for pending in self._gatt_ops
+                           if pending[0] == 'write' and pending[4] is not None), None)
+            if victim is not None:
+                self._gatt_ops.remove(victim)
+                self.gatt_ops_dropped += 1
+            elif key is not None:
+                self.gatt_ops_dropped += 1
+                return False
+        
+        self._gatt_ops.append(op)
+        return True
+
+    def _pump_gatt_ops(self):
+        with self._gatt_lock:
+            if self._gatt_busy or not self._gatt_ops:
+                return
+            op = self._gatt_ops.popleft()
+            self._gatt_busy = True
+            self._gatt_inflight = op[0]
+            self._gatt_op_started = time.monotonic()
+        self._run_gatt_op(op)
+
+    def _run_gatt_op(self, op):
+        success = self._start_gatt_op(op)
+        if not success:
+            self._on_gatt_op_complete(op[0])
+        return success
+
+    def _start_gatt_op(self, op):
+        try:
+            if not self.gatt:
+                return False
+            
+            kind = op[0]
+            if kind == 'write':
+                _, char, data, write_type, _ = op
+                self.gatt_writes += 1
+                char.setWriteType(write_type)
+                char.setValue(data)
+                success = self.gatt.writeCharacteristic(char)
+                if success:
+                    self.last_communication_time = time.time()
+                else:
+                    self.write_failures += 1
+                return success
+            
+            if kind == 'descriptor':
+                _, desc, value = op
+                desc.setValue(value)
+                return self.gatt.writeDescriptor(desc)
+            
+            if kind == 'mtu':
+                return self.gatt.requestMtu(op[1])
+            
+            if kind == 'discover':
+                return self.gatt.discoverServices()
+            
+            print(f"Unknown GATT operation: {kind}")
+            return False
             
         except Exception as e:
-            print(f"BLE send error: {e}")
+            print(f"BLE GATT operation error: {e}")
             return False
 
+    def _on_gatt_op_complete(self, kind):
+        with self._gatt_lock:
+            if kind != self._gatt_inflight:
+                # پاسخ دیرهنگام عملیاتی که رها شده؛ جای عملیات در حال اجرا را آزاد نمی‌کند
+                print(f"Ignoring late GATT {kind} completion")
+                return
+            self._gatt_busy = False
+            self._gatt_inflight = None
+            self.gatt_ops_completed += 1
+        self._pump_gatt_ops()
+
+    def _abandon_gatt_op(self, kind):
+        with self._gatt_lock:
+            if self._gatt_inflight != kind:
+                return False
+            self._gatt_busy = False
+            self._gatt_inflight = None
+            self.gatt_ops_timed_out += 1
+        self._pump_gatt_ops()
+        return True
+
     def disconnect(self):
         try:
             if HAS_ANDROID and self.gatt:
@@ -1769,12 +3264,41 @@ class AndroidBLE:
                     self.gatt = None
             self.connected = False
             self.characteristics = {}
+            self._stop_gatt_watchdog()
+            self._reset_gatt_ops()
             print("BLE disconnected")
         except Exception as e:
             print(f"BLE disconnect error: {e}")
 
-    def set_battery_callback(self, cb):
-        self.battery_update_callback = cb
+    def get_diagnostics(self):
+        return {
+            'transport': 'ble',
+            'device': self.device_name,
+            'connected': self.connected,
+            'write_failures': self.write_failures,
+            'write_without_response': bool(self.write_props & GATT_PROP_WRITE_NO_RESPONSE),
+            'mtu': self.mtu,
+            'max_payload': self.max_payload,
+            'connection_priority': CONNECTION_PRIORITY_NAMES.get(self.connection_priority),
+            'priority_changes': self.priority_changes,
+            'gatt_cache': {'hits': self.gatt_cache_hits, 'misses': self.gatt_cache_misses},
+            'gatt_queue': {
+                'depth': len(self._gatt_ops),
+                'completed': self.gatt_ops_completed,
+                'dropped': self.gatt_ops_dropped,
+                'coalesced': self.gatt_ops_coalesced,
+                'timed_out': self.gatt_ops_timed_out,
+            },
+        }
+
+    def get_link_stats(self):
+        """ورودی تخمین کیفیت لینک: نوشتن‌های GATT، شکست‌ها (شامل حذف از صف) و عمق صف"""
+        return {
+            'writes': self.gatt_writes + self.gatt_ops_dropped,
+            'failed': self.write_failures + self.gatt_ops_dropped,
+            'depth': len(self._gatt_ops),
+            'max_depth': self.gatt_queue_max,
+        }
 
     def check_signal_strength(self):
         if not self.connected:
@@ -1795,13 +3319,15 @@ class ClassicBluetooth:
         self.device_name = ""
         self.main_app = None
         self.socket = None
+        self.max_payload = 64
         self.battery_level = 85
         self.bluetooth_adapter = None
         self.last_communication_time = 0
         self.signal_check_interval = 5
         self._receive_thread = None
         self._should_receive = False
-        self.battery_update_callback = None
+        self._framer = None
+        self.telemetry = TelemetryDispatcher()
 
     def initialize(self):
         if not HAS_ANDROID:
@@ -1852,7 +3378,7 @@ class ClassicBluetooth:
             print(f"Classic Bluetooth scan error: {e}")
             return [f"Scan error: {str(e)}"]
 
-    def connect(self, device_address):
+    def connect(self, device_address, future=None):
         try:
             print(f"Classic BT connect to: {device_address}")
             
@@ -1873,6 +3399,8 @@ class ClassicBluetooth:
                 self.disconnect()
                 time.sleep(1)
             
+            future = future or ConnectFuture(device_address)
+            future.enter_phase('socket')
             BluetoothDevice = autoclass('android.bluetooth.BluetoothDevice')
             UUID = autoclass('java.util.UUID')
             
@@ -1881,10 +3409,16 @@ class ClassicBluetooth:
                 print(f"Device not found: {address}")
                 return False
             
+            # یک discovery در حال اجرا اتصال RFCOMM را بسیار کند می‌کند
+            self.bluetooth_adapter.cancelDiscovery()
             uuid = UUID.fromString("00001101-0000-1000-8000-00805F9B34FB")
             socket = device.createRfcommSocketToServiceRecord(uuid)
+            future.on_cancel(socket.close)
             
+            future.enter_phase('link')
             socket.connect()
+            future.check()
+            future.end_phase()
             self.socket = socket
             self.connected = True
             self.last_communication_time = time.time()
@@ -1894,34 +3428,41 @@ class ClassicBluetooth:
             
             return True
             
+        except ConnectAborted as e:
+            print(f"Classic Bluetooth connect aborted: {e}")
+            return False
         except Exception as e:
+            if future is not None and future.state != 'pending':
+                print(f"Classic Bluetooth connect aborted: {future.error}")
+                return False
             print(f"Classic Bluetooth connect error: {e}")
             return False
 
+    def _on_control_byte(self, control):
+        if control == PROTOCOL_BINARY_ACK and self.main_app:
+            self.main_app.on_binary_protocol_ack()
+
+    def expect_control_byte(self, control, timeout):
+        if self._framer:
+            self._framer.expect_control_byte(control, timeout)
+
     def _start_receive_thread(self):
+        framer = self._framer = LineFramer(on_control_byte=self._on_control_byte)
+        
         def receive_loop():
             try:
                 input_stream = self.socket.getInputStream()
                 buffer = bytearray(1024)
+                chunk = memoryview(buffer)
                 
                 while self.connected and self.socket:
                     try:
                         bytes_read = input_stream.read(buffer)
                         if bytes_read > 0:
-                            data = buffer[:bytes_read].decode('utf-8').strip()
-                            print(f"Classic BT: {data}")
                             self.last_communication_time = time.time()
                             
-                            if "BAT" in data or "battery" in data.lower():
-                                try:
-                                    numbers = [int(s) for s in data.split() if s.isdigit()]
-                                    if numbers:
-                                        level = max(0, min(100, numbers[0]))
-                                        self.battery_level = level
-                                        if self.battery_update_callback:
-                                            Clock.schedule_once(lambda dt: self.battery_update_callback(level))
-                                except:
-                                    pass
+                            for line in framer.feed(chunk[:bytes_read]):
+                                self.telemetry.dispatch(line)
                                 
                     except Exception as e:
                         if self.connected:
@@ -1946,17 +3487,20 @@ class ClassicBluetooth:
             print(f"[Classic BT NOT CONNECTED] {command}")
             return False
             
+        if self.send_raw((command + '\n').encode('utf-8')):
+            print(f"Classic BT Command: {command}")
+            return True
+        return False
+
+    def send_raw(self, data):
+        if not self.connected or not HAS_ANDROID or not self.socket:
+            return False
+            
         try:
-            if not self.socket:
-                return False
-                
             output_stream = self.socket.getOutputStream()
-            data = (command + '\n').encode('utf-8')
-            output_stream.write(data)
+            output_stream.write(bytes(data))
             output_stream.flush()
             self.last_communication_time = time.time()
-            
-            print(f"Classic BT Command: {command}")
             return True
             
         except Exception as e:
@@ -1976,8 +3520,12 @@ class ClassicBluetooth:
         except Exception as e:
             print(f"Classic Bluetooth disconnect error: {e}")
 
-    def set_battery_callback(self, callback):
-        self.battery_update_callback = callback
+    def get_diagnostics(self):
+        return {
+            'transport': 'classic',
+            'device': self.device_name,
+            'connected': self.connected,
+        }
 
     def check_signal_strength(self):
         if not self.connected:
@@ -1993,34 +3541,774 @@ class ClassicBluetooth:
         else:
             return 2
 
+RTT_HISTOGRAM_BUCKETS_MS = (10, 20, 50, 100, 200, 500)
+
+class LinkProbe:
+    def __init__(self, window=200, timeout=2.0):
+        self.timeout = timeout
+        self._samples = deque(maxlen=window)
+        self._pending = {}
+        self._seq = 0
+        self.sent_count = 0
+        self.received_count = 0
+        self.lost_count = 0
+        self.last_pong_time = 0.0
+        self.supported = False
+
+    def reset(self):
+        self._samples.clear()
+        self._pending = {}
+        self.sent_count = 0
+        self.received_count = 0
+        self.lost_count = 0
+        self.last_pong_time = 0.0
+        self.supported = False
+
+    def next_ping(self):
+        now = time.monotonic()
+        for seq, sent_at in list(self._pending.items()):
+            if now - sent_at > self.timeout and self._pending.pop(seq, None) is not None:
+                self.lost_count += 1
+        
+        self._seq = (self._seq + 1) & 0x7FFF
+        self._pending[self._seq] = now
+        self.sent_count += 1
+        return self._seq
+
+    def on_pong(self, seq):
+        sent_at = self._pending.pop(seq, None)
+        if sent_at is None:
+            return
+        now = time.monotonic()
+        self._samples.append((now - sent_at) * 1000.0)
+        self.received_count += 1
+        self.last_pong_time = now
+        self.supported = True
+
+    def silence(self):
+        if not self.last_pong_time:
+            return 0.0
+        return time.monotonic() - self.last_pong_time
+
+    def get_stats(self):
+        samples = list(self._samples)
+        answered = self.received_count + self.lost_count
+        stats = {
+            'samples': len(samples),
+            'sent': self.sent_count,
+            'received': self.received_count,
+            'lost': self.lost_count,
+            'loss': self.lost_count / answered if answered else 0.0,
+            'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'jitter': 0.0,
+            'histogram': {},
+        }
+        if not samples:
+            return stats
+        
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        stats['p50'] = ordered[int(last * 0.50)]
+        stats['p95'] = ordered[int(last * 0.95)]
+        stats['p99'] = ordered[int(last * 0.99)]
+        if len(samples) > 1:
+            stats['jitter'] = sum(abs(samples[i] - samples[i - 1]) for i in range(1, len(samples))) / (len(samples) - 1)
+        
+        histogram = {}
+        for rtt in samples:
+            bucket = next((f"<{b}ms" for b in RTT_HISTOGRAM_BUCKETS_MS if rtt < b), f">={RTT_HISTOGRAM_BUCKETS_MS[-1]}ms")
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        stats['histogram'] = histogram
+        return stats
+
+class LinkQualityEstimator:
+    def __init__(self, max_rate=30, min_rate=5, step_up=2.0):
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min_rate)
+        self.step_up = step_up
+        self.quality = 1.0
+        self.rate = self.max_rate
+        self.components = {}
+        self._last_sent = 0
+        self._last_failed = 0
+        self._last_link = None
+
+    def reset(self, max_rate=None):
+        if max_rate is not None:
+            self.max_rate = max(self.min_rate, float(max_rate))
+        self.quality = 1.0
+        self.rate = self.max_rate
+        self.components = {}
+        self._last_sent = 0
+        self._last_failed = 0
+        self._last_link = None
+
+    @staticmethod
+    def _scale(value, good, bad):
+        if value <= good:
+            return 1.0
+        if value >= bad:
+            return 0.0
+        return 1.0 - (value - good) / (bad - good)
+
+    def update(self, rtt_stats, send_stats, link_stats=None):
+        components = {}
+        
+        if rtt_stats.get('samples'):
+            components['rtt'] = self._scale(rtt_stats['p95'], 60.0, 400.0)
+            components['loss'] = self._scale(rtt_stats['loss'], 0.0, 0.25)
+        
+        if send_stats:
+            components['queue'] = min(
+                self._scale(send_stats['depth'], 2, 16),
+                self._scale(send_stats['avg_latency_ms'], 1000.0 / self.rate, 250.0),
+            )
+            sent = send_stats['sent'] - self._last_sent
+            failed = send_stats['failed'] - self._last_failed
+            self._last_sent = send_stats['sent']
+            self._last_failed = send_stats['failed']
+            if sent + failed > 0:
+                components['writes'] = self._scale(failed / (sent + failed), 0.0, 0.2)
+        
+        # شکست‌های لایه لینک (مثلاً نوشتن GATT که بعد از صف شدن رد می‌شود) در آمار ارسال دیده نمی‌شوند
+        if link_stats:
+            components['link_queue'] = self._scale(link_stats['depth'], 2, link_stats['max_depth'])
+            if self._last_link is not None:
+                writes = link_stats['writes'] - self._last_link['writes']
+                failed = link_stats['failed'] - self._last_link['failed']
+                if writes > 0:
+                    components['link_writes'] = self._scale(min(1.0, failed / writes), 0.0, 0.2)
+            self._last_link = link_stats
+        
+        instant = min(components.values()) if components else 1.0
+        self.quality = self.quality * 0.7 + instant * 0.3
+        self.components = components
+        
+        target = self.min_rate + (self.max_rate - self.min_rate) * self.quality
+        if target < self.rate:
+            self.rate = target
+        else:
+            self.rate = min(target, self.rate + self.step_up)
+        return self.rate
+
+COALESCED_CHANNELS = ('S', 'G', 'C')
+# فریم وضعیت حلقه کنترل هر tick یک بار و بی‌درنگ ارسال می‌شود (heartbeat ماشین)؛ نه حذف تکراری، نه ادغام
+STATE_FRAME_CHANNEL = 'C'
+
+def command_channel(command):
+    if len(command) > 1 and command[0] in COALESCED_CHANNELS and command[1:].isdigit():
+        return command[0]
+    return None
+
+PROTOCOL_BINARY_REQUEST = 0xB0
+PROTOCOL_BINARY_ACK = 0xB1
+BINARY_ACK_TIMEOUT = 2.0
+
+FRAME_MAGIC = 0xA5
+FRAME_HEADER = struct.Struct('<BBBh')
+FRAME_SIZE = FRAME_HEADER.size + 1
+
+FRAME_CHANNELS = {
+    'S': 0x01, 'G': 0x02,
+    'N': 0x10, 'R': 0x11, 'D': 0x12,
+    'LTL': 0x20, 'RTL': 0x21, 'ALL': 0x22,
+    'LIT': 0x30, 'LED': 0x31, 'RGB': 0x32, 'STA': 0x33,
+    'HOR': 0x40, 'HOF': 0x41, 'LHO': 0x42,
+    'ACC': 0x50,
+    'PNG': 0x70,
+}
+
+STATE_FRAME_MAGIC = 0xA6
+STATE_FRAME_HEADER = struct.Struct('<BBBBB')
+FRAME_STATE = 0x60
+
+STATE_GEAR_CODES = {'N': 0, 'D': 1, 'R': 2}
+STATE_SIGNAL_CODES = {None: 0, 'LTL': 1, 'RTL': 2, 'ALL': 3}
+
+def steering_value_from_angle(angle):
+    return max(0, min(100, 50 + int((angle / 90) * 50)))
+
+def build_state_command(steering, throttle, gear, turn_signal):
+    return (f"C{int(steering):03d}{int(throttle):03d}"
+            f"{STATE_GEAR_CODES.get(gear, 0)}{STATE_SIGNAL_CODES.get(turn_signal, 0)}")
+
+def _parse_number(rest):
+    start = 0
+    size = len(rest)
+    while start < size and rest[start] in b' :=\t':
+        start += 1
+    
+    end = start
+    if end < size and rest[end] in b'+-':
+        end += 1
+    while end < size and (48 <= rest[end] <= 57 or rest[end] == 46):
+        end += 1
+    
+    if end == start:
+        raise ValueError("no numeric value")
+    return float(bytes(rest[start:end]))
+
+def parse_percent(rest):
+    return max(0, min(100, int(_parse_number(rest))))
+
+def parse_int(rest):
+    return int(_parse_number(rest))
+
+def parse_float(rest):
+    return _parse_number(rest)
+
+def parse_legacy_battery(line):
+    """قالب قدیمی فرم‌ور: اولین عدد جدا شده در خط، مثل 'Battery level 80'"""
+    for token in line.split():
+        if token.isdigit():
+            return max(0, min(100, int(token)))
+    raise ValueError("no numeric value")
+
+class TelemetryDispatcher:
+    def __init__(self):
+        self._handlers = {}
+        self._fallbacks = []
+        self._subscribers = {}
+        self.values = {}
+        self.dispatched_count = 0
+        self.unhandled_count = 0
+        self.error_count = 0
+        
+        self.register('BAT', 'battery', parse_percent)
+        self.register('BATTERY', 'battery', parse_percent)
+        self.register('SPD', 'speed', parse_float)
+        self.register('RSSI', 'rssi', parse_int)
+        self.register('TMP', 'motor_temp', parse_float)
+        self.register('VOLT', 'voltage', parse_float)
+        self.register('PONG', 'pong', parse_int)
+        
+        # خطوطی که با هیچ پیشوندی نمی‌خوانند، مثل گزارش باتری فرم‌ورهای قدیمی
+        self.register_fallback('battery', lambda line: b'BAT' in line or b'battery' in line.lower(),
+                               parse_legacy_battery)
+
+    def register(self, prefix, name, parser):
+        self._handlers[prefix.upper().encode('ascii')] = (name, parser)
+
+    def register_fallback(self, name, match, parser):
+        """match و parser کل خط (bytes) را می‌گیرند؛ فقط وقتی اجرا می‌شوند که جدول پیشوند جواب ندهد"""
+        self._fallbacks.append((name, match, parser))
+
+    def subscribe(self, name, callback):
+        self._subscribers.setdefault(name, []).append(callback)
+
+    def unsubscribe(self, name, callback):
+        callbacks = self._subscribers.get(name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def dispatch(self, line):
+        size = len(line)
+        end = 0
+        while end < size and (65 <= (line[end] & 0xDF) <= 90):
+            end += 1
+        
+        handler = self._handlers.get(bytes(line[:end]).upper()) if end else None
+        if handler is None:
+            if self._dispatch_fallback(line):
+                return True
+            self.unhandled_count += 1
+            print(f"Telemetry (unhandled): {str(line, 'utf-8', 'ignore')}")
+            return False
+        
+        name, parser = handler
+        try:
+            value = parser(line[end:])
+        except Exception as e:
+            if self._dispatch_fallback(line):
+                return True
+            self.error_count += 1
+            print(f"Telemetry parse error for {name}: {e}")
+            return False
+        
+        self._publish(name, value)
+        return True
+
+    def _dispatch_fallback(self, line):
+        text = bytes(line)
+        for name, match, parser in self._fallbacks:
+            if match(text):
+                try:
+                    self._publish(name, parser(text))
+                    return True
+                except Exception:
+                    continue
+        return False
+
+    def _publish(self, name, value):
+        self.values[name] = value
+        self.dispatched_count += 1
+        for callback in self._subscribers.get(name, ()):
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Telemetry subscriber error for {name}: {e}")
+
+class TelemetryUiBridge:
+    def __init__(self, max_pending=256):
+        self._pending = deque(maxlen=max_pending)
+        self._callbacks = {}
+        self._scheduled = False
+        self._trigger = Clock.create_trigger(self._flush)
+        self.posted_count = 0
+        self.applied_count = 0
+        self.frame_count = 0
+
+    def bind(self, name, callback):
+        self._callbacks.setdefault(name, []).append(callback)
+
+    def post(self, name, value):
+        self._pending.append((name, value))
+        self.posted_count += 1
+        if not self._scheduled:
+            self._scheduled = True
+            self._trigger()
+
+    def _flush(self, dt):
+        self._scheduled = False
+        latest = {}
+        pending = self._pending
+        while pending:
+            try:
+                name, value = pending.popleft()
+            except IndexError:
+                break
+            latest[name] = value
+        
+        if not latest:
+            return
+        
+        self.frame_count += 1
+        for name, value in latest.items():
+            for callback in self._callbacks.get(name, ()):
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"UI update error for {name}: {e}")
+            self.applied_count += 1
+
+class LineFramer:
+    def __init__(self, capacity=1024, delimiter=b'\n', on_control_byte=None):
+        self.capacity = capacity
+        self.delimiter = delimiter[0]
+        self.control_bytes = ()
+        self.on_control_byte = on_control_byte
+        self._control_deadline = 0.0
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._discarding = False
+        self.message_count = 0
+        self.overflow_count = 0
+
+    def reset(self):
+        self._start = 0
+        self._end = 0
+        self._discarding = False
+
+    def expect_control_byte(self, control, timeout):
+        """بایت کنترلی فقط تا پایان timeout و فقط در ابتدای خط (یا بسته تک‌بایتی) شناخته می‌شود؛
+        بقیه زمان‌ها همان بایت بخشی از متن UTF-8 است و دست نمی‌خورد"""
+        self.control_bytes = (control,)
+        self._control_deadline = time.monotonic() + timeout
+
+    def writable(self):
+        if self._start:
+            remaining = self._end - self._start
+            self._buffer[:remaining] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = remaining
+        
+        if self._end >= self.capacity:
+            print(f"Line framer overflow - dropping {self._end} bytes without delimiter")
+            self.overflow_count += 1
+            self.reset()
+            self._discarding = True
+        
+        return self._view[self._end:]
+
+    def commit(self, count, packet=False):
+        begin = self._end
+        end = begin + count
+        
+        if self.control_bytes:
+            if time.monotonic() > self._control_deadline:
+                self.control_bytes = ()
+            else:
+                end = self._take_control_bytes(begin, end, packet)
+        
+        self._end = end
+
+    def _take_control_bytes(self, begin, end, packet):
+        buf = self._buffer
+        if packet and end - begin == 1 and buf[begin] in self.control_bytes:
+            self._fire_control(buf[begin])
+            return begin
+        
+        index = begin
+        while index < end:
+            at_line_start = index == self._start or buf[index - 1] == self.delimiter
+            if at_line_start and buf[index] in self.control_bytes:
+                control = buf[index]
+                buf[index:end - 1] = self._view[index + 1:end]
+                end -= 1
+                self._fire_control(control)
+                continue
+            
+            newline = buf.find(self.delimiter, index, end)
+            if newline == -1:
+                break
+            index = newline + 1
+        return end
+
+    def _fire_control(self, control):
+        # تک‌مصرفی: بعد از دریافت پاسخ، بایت دوباره متن عادی است
+        self.control_bytes = ()
+        if self.on_control_byte:
+            self.on_control_byte(control)
+
+    def feed(self, data, packet=False):
+        size = len(data)
+        offset = 0
+        while offset < size:
+            target = self.writable()
+            count = min(len(target), size - offset)
+            target[:count] = data[offset:offset + count]
+            self.commit(count, packet and count == size)
+            offset += count
+            if offset < size:
+                yield from self.messages()
+        yield from self.messages()
+
+    def messages(self):
+        buf = self._buffer
+        while self._start < self._end:
+            index = buf.find(self.delimiter, self._start, self._end)
+            if index == -1:
+                return
+            
+            line_end = index
+            if line_end > self._start and buf[line_end - 1] == 0x0D:
+                line_end -= 1
+            
+            line = self._view[self._start:line_end]
+            self._start = index + 1
+            if self._discarding:
+                self._discarding = False
+                continue
+            
+            self.message_count += 1
+            if len(line):
+                yield line
+
+class BinaryFrameCodec:
+    def __init__(self, max_payload=20):
+        self.max_payload = max_payload
+        self.frames_per_write = max(1, max_payload // FRAME_SIZE)
+        self._buffer = bytearray(FRAME_SIZE * self.frames_per_write)
+        self._view = memoryview(self._buffer)
+        self._seq = 0
+
+    @staticmethod
+    def parse_command(command):
+        if len(command) == 9 and command[0] == 'C' and command[1:].isdigit():
+            flags = int(command[7]) | (int(command[8]) << 2)
+            return FRAME_STATE, (int(command[1:4]), int(command[4:7]), flags)
+        
+        channel = FRAME_CHANNELS.get(command)
+        if channel is not None:
+            return channel, 0
+        
+        for split in (1, 3):
+            prefix, value = command[:split], command[split:]
+            if prefix in FRAME_CHANNELS and value.isdigit():
+                return FRAME_CHANNELS[prefix], int(value)
+        return None
+
+    def pack(self, frames):
+        count = min(len(frames), self.frames_per_write)
+        buf = self._buffer
+        for i in range(count):
+            channel, value = frames[i]
+            offset = i * FRAME_SIZE
+            if channel == FRAME_STATE:
+                steering, throttle, flags = value
+                STATE_FRAME_HEADER.pack_into(buf, offset, STATE_FRAME_MAGIC, self._seq, steering, throttle, flags)
+            else:
+                FRAME_HEADER.pack_into(buf, offset, FRAME_MAGIC, channel, self._seq, value)
+            checksum = 0
+            for b in range(offset, offset + FRAME_SIZE - 1):
+                checksum ^= buf[b]
+            buf[offset + FRAME_SIZE - 1] = checksum
+            self._seq = (self._seq + 1) & 0xFF
+        return self._view[:count * FRAME_SIZE]
+
+class CommandSender:
+    def __init__(self, transport, max_depth=64, tick_rate=30):
+        self.transport = transport
+        self.max_depth = max_depth
+        self._queue = deque()
+        self._latest = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._tick_interval = 1.0 / 30
+        self._next_flush = 0.0
+        self.codec = None
+        self.set_tick_rate(tick_rate)
+        
+        self.enqueued_count = 0
+        self.sent_count = 0
+        self.failed_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def set_tick_rate(self, rate_hz):
+        try:
+            rate_hz = max(1.0, min(200.0, float(rate_hz)))
+        except (ValueError, TypeError):
+            rate_hz = 30.0
+        with self._cond:
+            self.tick_rate = rate_hz
+            self._tick_interval = 1.0 / rate_hz
+            self._cond.notify()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"Command sender started (max depth {self.max_depth}, tick {self.tick_rate:.0f} Hz)")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            dropped = len(self._queue) + len(self._latest)
+            self._queue.clear()
+            self._latest.clear()
+            self._cond.notify_all()
+        self._thread = None
+        if dropped:
+            self.dropped_count += dropped
+        print(f"Command sender stopped ({dropped} pending commands dropped)")
+
+    def enqueue(self, command):
+        channel = command_channel(command)
+        with self._cond:
+            if not self._running:
+                return False
+            if channel and channel != STATE_FRAME_CHANNEL:
+                if channel in self._latest:
+                    self.coalesced_count += 1
+                self._latest[channel] = (command, time.monotonic())
+            else:
+                if len(self._queue) >= self.max_depth:
+                    self._queue.popleft()
+                    self.dropped_count += 1
+                self._queue.append((command, time.monotonic()))
+            self.enqueued_count += 1
+            self._cond.notify()
+        return True
+
+    def request_binary_protocol(self):
+        with self._cond:
+            if not self._running:
+                return False
+            self._queue.append((bytes((PROTOCOL_BINARY_REQUEST,)), time.monotonic()))
+            self._cond.notify()
+        print("Binary protocol requested")
+        return True
+
+    def enable_binary_protocol(self, max_payload):
+        self.codec = BinaryFrameCodec(max_payload)
+        print(f"Binary protocol enabled ({self.codec.frames_per_write} frames per write)")
+
+    def depth(self):
+        return len(self._queue) + len(self._latest)
+
+    def get_stats(self):
+        return {
+            'depth': self.depth(),
+            'enqueued': self.enqueued_count,
+            'sent': self.sent_count,
+            'failed': self.failed_count,
+            'dropped': self.dropped_count,
+            'coalesced': self.coalesced_count,
+            'tick_rate': self.tick_rate,
+            'protocol': 'binary' if self.codec else 'ascii',
+            'last_latency_ms': round(self.last_latency_ms, 2),
+            'avg_latency_ms': round(self.avg_latency_ms, 2),
+            'max_latency_ms': round(self.max_latency_ms, 2),
+        }
+
+    def _next_batch(self):
+        with self._cond:
+            while self._running:
+                limit = self.codec.frames_per_write if self.codec else 1
+                batch = []
+                while self._queue and len(batch) < limit:
+                    batch.append(self._queue.popleft())
+                
+                if self._latest and self._next_flush - time.monotonic() <= 0:
+                    batch.extend(self._latest.values())
+                    self._latest.clear()
+                    self._next_flush = time.monotonic() + self._tick_interval
+                
+                if batch:
+                    return batch
+                
+                if self._latest:
+                    self._cond.wait(self._next_flush - time.monotonic())
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            
+            codec = self.codec
+            control_frames = ([], [])
+            other_frames = ([], [])
+            for command, enqueued_at in batch:
+                if isinstance(command, bytes):
+                    self._record(self._send_raw(command), enqueued_at)
+                    continue
+                
+                parsed = codec.parse_command(command) if codec else None
+                if parsed is None:
+                    self._record(self._send_command(command), enqueued_at)
+                else:
+                    frames, times = control_frames if command_channel(command) else other_frames
+                    frames.append(parsed)
+                    times.append(enqueued_at)
+            
+            self._send_frames(codec, other_frames, control=False)
+            self._send_frames(codec, control_frames, control=True)
+
+    def _send_frames(self, codec, frame_list, control):
+        frames, times = frame_list
+        if not frames:
+            return
+        
+        for start in range(0, len(frames), codec.frames_per_write):
+            chunk = frames[start:start + codec.frames_per_write]
+            key = tuple(channel for channel, _ in chunk) if control else None
+            ok = self._send_raw(codec.pack(chunk), control, key)
+            for enqueued_at in times[start:start + len(chunk)]:
+                self._record(ok, enqueued_at)
+
+    def _send_command(self, command):
+        try:
+            return self.transport.send_command(command)
+        except Exception as e:
+            print(f"Command sender error: {e}")
+            return False
+
+    def _send_raw(self, data, control=False, key=None):
+        try:
+            if control and hasattr(self.transport, 'send_control_raw'):
+                return self.transport.send_control_raw(data, key)
+            return self.transport.send_raw(data)
+        except Exception as e:
+            print(f"Command sender raw write error: {e}")
+            return False
+
+    def _record(self, ok, enqueued_at):
+        latency_ms = (time.monotonic() - enqueued_at) * 1000.0
+        self.last_latency_ms = latency_ms
+        self.avg_latency_ms = latency_ms if not self.sent_count else self.avg_latency_ms * 0.9 + latency_ms * 0.1
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        
+        if ok:
+            self.sent_count += 1
+        else:
+            self.failed_count += 1
+
 class ConnectionManager:
     def __init__(self):
         self.connection_type = get_setting('connection_type', 'ble')
         self.ble = AndroidBLE()
         self.classic_bt = ClassicBluetooth()
         self.wifi = SimpleWiFiManager()
+        self.scan_cache = ScanCache()
         
         self.ble.main_app = self
         self.classic_bt.main_app = self
         self.wifi.main_app = self
         
+        self.telemetry = TelemetryDispatcher()
+        self.ble.telemetry = self.telemetry
+        self.classic_bt.telemetry = self.telemetry
+        self.wifi.telemetry = self.telemetry
+        self.telemetry.subscribe('battery', self._on_battery_telemetry)
+        self.ui_bridge = TelemetryUiBridge()
+        
+        self.link_probe = LinkProbe()
+        self.telemetry.subscribe('pong', self.link_probe.on_pong)
+        self.ping_event = None
+        self.ping_interval = 1.0
+        self.signal_timeout = 6.0
+        self.link_quality = LinkQualityEstimator(max_rate=get_setting('control_rate_hz', 30))
+        
         self.connected = False
         self.device_name = ""
         self.battery_level = 85
         self.main_app = None
         self.signal_check_event = None
+        self.command_sender = None
+        self.refresh_event = None
+        self.refresh_interval = float(get_setting('command_refresh_interval', 1.0))
+        self._last_sent_values = {}
+        self.duplicates_suppressed = 0
+        
+        self.last_address = None
+        self.last_connection_type = None
+        self.reconnect_event = None
+        self.reconnect_attempt = 0
+        self.reconnect_base_delay = 0.5
+        self.reconnect_max_delay = 8.0
+        self.reconnect_max_attempts = 10
+        self.reconnect_stable_after = 5.0
+        self.reconnect_stats = {'count': 0, 'gave_up': 0, 'last_ms': None, 'avg_ms': None, 'max_ms': None}
+        self._connected_at = 0.0
+        self._signal_lost_at = None
+        self.connect_future = None
+        self._connect_conn = None
+        self.startup_connect_ms = None
+        self.first_command_ms = None
+        self._binary_ack_deadline = 0.0
+        self.driving = False
+        self.drive_idle_timeout = 5.0
+        self._last_drive_activity = 0.0
         
     def show_connection_message(self, message, msg_type):
         if self.main_app and hasattr(self.main_app, 'show_connection_message'):
-            self.main_app.show_connection_message(message, msg_type)
+            # ممکن است از ترد اتصال صدا زده شود
+            Clock.schedule_once(lambda dt: self.main_app.show_connection_message(message, msg_type))
         else:
             print(f"{msg_type.upper()}: {message}")
     
     def set_connection_type(self, conn_type):
+        changed = conn_type != self.connection_type
         self.connection_type = conn_type
         set_setting('connection_type', conn_type)
+        if not changed:
+            return
         print(f"Connection type set to: {conn_type}")
         
+        self.cancel_connect()
         if self.connected:
             self.disconnect()
     
@@ -2032,75 +4320,423 @@ class ConnectionManager:
         else:
             return self.wifi
     
-    def start_scan(self, callback):
+    def start_scan(self, callback, force=False):
+        conn_type = self.connection_type
+        cached = self.scan_cache.get(conn_type)
+        if cached:
+            Clock.schedule_once(lambda dt: callback(cached))
+            if not force and self.scan_cache.is_fresh(conn_type):
+                print(f"Using cached {conn_type} scan results ({self.scan_cache.age(conn_type):.0f}s old)")
+                return [f"Cached {conn_type.upper()} results"]
+        
+        def on_results(devices):
+            if scan_result_has_devices(devices):
+                self.scan_cache.put(conn_type, devices)
+                callback(ScanCache.merge_stale(devices, cached))
+            elif not cached:
+                callback(devices)
+        
         try:
+            if conn_type == 'wifi':
+                return self.wifi.scanner.start_scan(on_results)
             conn = self.get_current_connection()
-            return conn.start_scan(callback)
+            return conn.start_scan(on_results)
         except Exception as e:
             print(f"ConnectionManager.start_scan error: {e}")
             return [f"Scan error: {str(e)}"]
     
-    def connect(self, device_address):
-        conn = self.get_current_connection()
-        success = conn.connect(device_address)
+    def connect(self, device_address, on_progress=None, on_done=None, timeouts=None):
+        """Connects on a worker thread and returns a ConnectFuture; callbacks run on the UI thread"""
+        return self._start_connect(self.get_current_connection(), device_address, on_progress, on_done, timeouts)
+    
+    def connect_wifi(self, ip, port):
+        on_progress = on_done = None
+        if self.main_app and hasattr(self.main_app, 'on_connect_finished'):
+            on_progress = self.main_app.on_connect_progress
+            on_done = lambda future: self.main_app.on_connect_finished(future, future.address)
+        return self._start_connect(self.wifi, f"{ip}:{port}", on_progress, on_done)
+    
+    def cancel_connect(self):
+        if self.connect_future:
+            self.connect_future.cancel()
+    
+    def _start_connect(self, conn, device_address, on_progress=None, on_done=None, timeouts=None):
+        if self.connect_future and not self.connect_future.done():
+            self.connect_future.cancel("Superseded by a new connection")
         
-        if success:
-            self.connected = True
-            self.device_name = conn.device_name
-            
-            self.start_signal_monitoring()
+        future = ConnectFuture(device_address, timeouts)
+        if on_progress:
+            future.add_progress_callback(on_progress)
+        future.add_done_callback(lambda f: self._on_connect_done(conn, f, on_done))
+        self.connect_future = future
+        self._connect_conn = conn
         
-        return success
+        def worker():
+            error = None
+            try:
+                success = conn.connect(device_address, future=future)
+            except Exception as e:
+                print(f"Connect worker error: {e}")
+                success, error = False, str(e)
+            
+            if not future.set_result(success, error or (None if success else "Connection failed")):
+                # لغو، timeout یا جایگزینی بعد از برقراری اتصال؛ اتصال رها نمی‌شود، مگر تلاش
+                # جدیدتری روی همین ترنسپورت در جریان باشد
+                superseded = self.connect_future not in (None, future) and self._connect_conn is conn
+                if success and not superseded:
+                    conn.disconnect()
+        
+        threading.Thread(target=worker, daemon=True).start()
+        return future
+    
+    def _on_connect_done(self, conn, future, on_done):
+        if self.connect_future is future:
+            self.connect_future = None
+        
+        if future.state == 'done':
+            self._on_connected(conn, future.address)
+        
+        if on_done:
+            on_done(future)
+    
+    def _on_connected(self, conn, device_address):
+        self.connected = True
+        self.device_name = conn.device_name
+        self.last_address = device_address
+        self.last_connection_type = self.connection_type
+        self._connected_at = time.monotonic()
+        set_setting('last_connected_device', device_address)
+        set_setting('last_connection_type', self.connection_type)
+        
+        if self.startup_connect_ms is None:
+            self.startup_connect_ms = round((self._connected_at - APP_START_TIME) * 1000.0, 1)
+            print(f"Cold start to connected: {self.startup_connect_ms:.0f} ms")
+        
+        self.start_command_sender(conn)
+        self.start_signal_monitoring()
+        self._set_driving(True)
+        
+        if self.reconnect_event:
+            self.reconnect_event.cancel()
+            self.reconnect_event = None
+        if self._signal_lost_at is not None:
+            self._finish_reconnect()
     
     def send_command(self, command):
         if not self.connected:
             print(f"[{self.connection_type.upper()} NOT CONNECTED] {command}")
             return False
-            
+        
+        if not self.command_sender:
+            self.start_command_sender(self.get_current_connection())
+        
+        if self.first_command_ms is None:
+            self.first_command_ms = round((time.monotonic() - APP_START_TIME) * 1000.0, 1)
+            print(f"Cold start to first command: {self.first_command_ms:.0f} ms")
+        
+        channel = command_channel(command)
+        if channel and channel != STATE_FRAME_CHANNEL:
+            last = self._last_sent_values.get(channel)
+            if last and last[0] == command:
+                self.duplicates_suppressed += 1
+                return True
+            self._last_sent_values[channel] = (command, time.monotonic())
+            self._set_driving(True)
+        
+        return self.command_sender.enqueue(command)
+    
+    def send_state(self, steering, throttle, gear, turn_signal):
+        return self.send_command(build_state_command(steering, throttle, gear, turn_signal))
+    
+    def start_command_sender(self, conn):
+        self.stop_command_sender()
+        control_rate = get_setting('control_rate_hz', 30)
+        self.link_quality.reset(control_rate)
+        self.command_sender = CommandSender(conn, tick_rate=control_rate)
+        self.command_sender.start()
+        self.refresh_event = Clock.schedule_interval(self._refresh_channels, self.refresh_interval)
+        
+        if get_setting('binary_protocol', False):
+            self._request_binary_protocol(conn)
+    
+    def stop_command_sender(self):
+        if self.refresh_event:
+            self.refresh_event.cancel()
+            self.refresh_event = None
+        if self.command_sender:
+            self.command_sender.stop()
+            self.command_sender = None
+        self._last_sent_values = {}
+    
+    def _request_binary_protocol(self, conn):
+        # انتظار برای 0xB1 قبل از ارسال 0xB0 تنظیم می‌شود تا پاسخ سریع از دست نرود
+        self._binary_ack_deadline = time.monotonic() + BINARY_ACK_TIMEOUT
+        if hasattr(conn, 'expect_control_byte'):
+            conn.expect_control_byte(PROTOCOL_BINARY_ACK, BINARY_ACK_TIMEOUT)
+        if not self.command_sender.request_binary_protocol():
+            self._binary_ack_deadline = 0.0
+    
+    def on_binary_protocol_ack(self):
+        if time.monotonic() > self._binary_ack_deadline:
+            print("Ignoring binary protocol ack without an outstanding request")
+            return
+        self._binary_ack_deadline = 0.0
+        if self.command_sender and not self.command_sender.codec:
+            conn = self.get_current_connection()
+            self.command_sender.enable_binary_protocol(getattr(conn, 'max_payload', 20))
+    
+    def _refresh_channels(self, dt):
+        if not self.connected or not self.command_sender:
+            return
+        
+        now = time.monotonic()
+        for channel, (command, sent_at) in list(self._last_sent_values.items()):
+            if now - sent_at >= self.refresh_interval:
+                self._last_sent_values[channel] = (command, now)
+                self.command_sender.enqueue(command)
+    
+    def _set_driving(self, driving):
+        if driving:
+            self._last_drive_activity = time.monotonic()
+        if driving == self.driving:
+            return
+        
+        self.driving = driving
+        conn = self.get_current_connection()
+        if hasattr(conn, 'set_connection_priority'):
+            conn.set_connection_priority(CONNECTION_PRIORITY_HIGH if driving else CONNECTION_PRIORITY_BALANCED)
+    
+    def set_control_rate(self, rate_hz):
+        set_setting('control_rate_hz', rate_hz)
+        self.link_quality.reset(rate_hz)
+        if self.command_sender:
+            self.command_sender.set_tick_rate(rate_hz)
+    
+    def update_link_quality(self):
+        if not self.command_sender:
+            return
+        
+        previous_rate = self.command_sender.tick_rate
         conn = self.get_current_connection()
-        return conn.send_command(command)
+        link_stats = conn.get_link_stats() if hasattr(conn, 'get_link_stats') else None
+        rate = self.link_quality.update(self.link_probe.get_stats(), self.command_sender.get_stats(), link_stats)
+        if abs(rate - previous_rate) >= 1:
+            print(f"Link quality {self.link_quality.quality:.0%} - control rate {previous_rate:.0f} -> {rate:.0f} Hz")
+        self.command_sender.set_tick_rate(rate)
+        
+        if self.main_app:
+            self.main_app.link_quality = self.link_quality.quality
+            self.main_app.control_rate = rate
+    
+    def get_diagnostics(self):
+        diagnostics = self.get_current_connection().get_diagnostics()
+        diagnostics['send'] = self.get_send_stats()
+        diagnostics['rtt'] = self.get_rtt_stats()
+        diagnostics['link_quality'] = {
+            'quality': round(self.link_quality.quality, 3),
+            'control_rate': round(self.link_quality.rate, 1),
+            'components': dict(self.link_quality.components),
+        }
+        diagnostics['reconnect'] = dict(self.reconnect_stats)
+        diagnostics['startup'] = {
+            'connected_ms': self.startup_connect_ms,
+            'first_command_ms': self.first_command_ms,
+        }
+        return diagnostics
+    
+    def get_diagnostics_summary(self):
+        """خلاصه یک‌خطی آمار اتصال برای پنجره اتصال"""
+        send = self.get_send_stats()
+        rtt = self.get_rtt_stats()
+        return (
+            f"Link {self.link_quality.quality:.0%} @ {self.link_quality.rate:.0f} Hz  "
+            f"RTT p50 {rtt['p50']:.0f} ms, loss {rtt['loss']:.0%}  "
+            f"Sent {send.get('sent', 0)}, dropped {send.get('dropped', 0)}, "
+            f"latency {send.get('avg_latency_ms', 0.0):.1f} ms"
+        )
+    
+    def get_send_stats(self):
+        if self.command_sender:
+            stats = self.command_sender.get_stats()
+            stats['duplicates_suppressed'] = self.duplicates_suppressed
+            return stats
+        return {}
+    
+    def disconnect(self):
+        if self.connected:
+            # آمار پیش از توقف فرستنده ثبت می‌شود
+            try:
+                print(f"Session diagnostics: {self.get_diagnostics()}")
+            except Exception as e:
+                print(f"Could not collect diagnostics: {e}")
+        self.stop_signal_monitoring()
+        self.stop_command_sender()
+        self.ble.disconnect()
+        self.classic_bt.disconnect()
+        self.wifi.disconnect()
+        self.connected = False
+        self.driving = False
+        self.device_name = ""
+        print("All connections disconnected")
+    
+    def set_battery_callback(self, callback):
+        self.ui_bridge.bind('battery', callback)
+    
+    def _on_battery_telemetry(self, level):
+        self.battery_level = level
+        self.get_current_connection().battery_level = level
+        self.ui_bridge.post('battery', level)
+    
+    def get_battery_level(self):
+        conn = self.get_current_connection()
+        return conn.battery_level
+    
+    def on_signal_lost(self):
+        was_connected = self.connected
+        
+        if self.main_app and hasattr(self.main_app, 'on_signal_lost'):
+            self.main_app.on_signal_lost()
+        
+        if was_connected and not self.connected:
+            self.start_reconnect()
+    
+    @property
+    def reconnecting(self):
+        return self._signal_lost_at is not None
+    
+    def start_reconnect(self):
+        if not self.last_address or self.reconnect_event:
+            return
+        
+        # A link that drops again right after coming back keeps backing off
+        if time.monotonic() - self._connected_at > self.reconnect_stable_after:
+            self.reconnect_attempt = 0
+        self._signal_lost_at = time.monotonic()
+        print(f"Starting reconnect to {self.last_address} via {self.last_connection_type.upper()}")
+        self._schedule_reconnect()
+    
+    def cancel_reconnect(self):
+        self.cancel_connect()
+        if self.reconnect_event:
+            self.reconnect_event.cancel()
+            self.reconnect_event = None
+        if self._signal_lost_at is not None:
+            print("Reconnect cancelled")
+        self._signal_lost_at = None
+        self.reconnect_attempt = 0
+    
+    def _schedule_reconnect(self):
+        delay = min(self.reconnect_max_delay, self.reconnect_base_delay * (2 ** self.reconnect_attempt))
+        delay = random.uniform(delay / 2, delay)
+        print(f"Reconnect attempt {self.reconnect_attempt + 1} in {delay:.2f}s")
+        self.reconnect_event = Clock.schedule_once(self._attempt_reconnect, delay)
     
-    def disconnect(self):
-        self.stop_signal_monitoring()
-        self.ble.disconnect()
-        self.classic_bt.disconnect()
-        self.wifi.disconnect()
-        self.connected = False
-        self.device_name = ""
-        print("All connections disconnected")
+    def _attempt_reconnect(self, dt):
+        self.reconnect_event = None
+        if self.connected or self._signal_lost_at is None:
+            return
+        
+        if self.connection_type != self.last_connection_type:
+            print("Connection type changed - reconnect abandoned")
+            self.cancel_reconnect()
+            return
+        
+        self.reconnect_attempt += 1
+        if self.main_app:
+            self.main_app.connection_status = f"Reconnecting ({self.reconnect_attempt}/{self.reconnect_max_attempts})..."
+        
+        self.connect(self.last_address, on_done=self._on_reconnect_attempt_done)
     
-    def set_battery_callback(self, callback):
-        self.ble.set_battery_callback(callback)
-        self.classic_bt.set_battery_callback(callback)
-        self.wifi.set_battery_callback(callback)
+    def _on_reconnect_attempt_done(self, future):
+        if future.state == 'done' or self._signal_lost_at is None:
+            return
+        
+        print(f"Reconnect attempt {self.reconnect_attempt} failed: {future.error}")
+        if self.reconnect_attempt >= self.reconnect_max_attempts:
+            print(f"Reconnect gave up after {self.reconnect_attempt} attempts")
+            self.reconnect_stats['gave_up'] += 1
+            self._signal_lost_at = None
+            if self.main_app and hasattr(self.main_app, 'on_reconnect_failed'):
+                self.main_app.on_reconnect_failed()
+            return
+        
+        self._schedule_reconnect()
     
-    def get_battery_level(self):
-        conn = self.get_current_connection()
-        return conn.battery_level
+    def _finish_reconnect(self):
+        elapsed_ms = (time.monotonic() - self._signal_lost_at) * 1000.0
+        self._signal_lost_at = None
+        
+        stats = self.reconnect_stats
+        stats['count'] += 1
+        stats['last_ms'] = round(elapsed_ms, 1)
+        stats['avg_ms'] = stats['last_ms'] if stats['avg_ms'] is None else round(stats['avg_ms'] * 0.8 + elapsed_ms * 0.2, 1)
+        stats['max_ms'] = max(stats['max_ms'] or 0.0, stats['last_ms'])
+        print(f"Reconnected to {self.device_name} in {elapsed_ms:.0f} ms after {self.reconnect_attempt} attempt(s)")
+        
+        if self.main_app and hasattr(self.main_app, 'on_reconnected'):
+            Clock.schedule_once(lambda dt: self.main_app.on_reconnected(elapsed_ms))
     
     def start_signal_monitoring(self):
-        if self.signal_check_event:
-            self.signal_check_event.cancel()
-        
-        self.signal_check_event = Clock.schedule_interval(self.check_signal, 3)
+        self.stop_signal_monitoring()
+        self.link_probe.reset()
+        self.signal_check_event = Clock.schedule_interval(self.check_signal, 1)
+        self.ping_event = Clock.schedule_interval(self._send_ping, self.ping_interval)
     
     def stop_signal_monitoring(self):
         if self.signal_check_event:
             self.signal_check_event.cancel()
             self.signal_check_event = None
+        if self.ping_event:
+            self.ping_event.cancel()
+            self.ping_event = None
+    
+    def _send_ping(self, dt):
+        if self.connected and self.command_sender:
+            self.command_sender.enqueue(f"PNG{self.link_probe.next_ping()}")
+    
+    def get_rtt_stats(self):
+        return self.link_probe.get_stats()
     
     def check_signal(self, dt):
-        if self.connected and self.main_app:
+        if not self.connected or not self.main_app:
+            return
+        
+        self.update_link_quality()
+        
+        # وضعیت واقعی کنترل‌ها ملاک است؛ فرمان یا گاز ثابت هم رانندگی حساب می‌شود
+        is_active = getattr(self.main_app, 'is_vehicle_active', None)
+        if is_active and is_active():
+            self._set_driving(True)
+        elif self.driving and time.monotonic() - self._last_drive_activity > self.drive_idle_timeout:
+            self._set_driving(False)
+        
+        if self.link_probe.supported:
+            if self.link_probe.silence() > self.signal_timeout:
+                print(f"No pong for {self.link_probe.silence():.1f}s - downlink lost")
+                Clock.schedule_once(lambda dt: self.on_signal_lost())
+                text, color = "No Signal", (1, 0, 0, 1)
+            else:
+                stats = self.link_probe.get_stats()
+                text = f"RTT {stats['p50']:.0f}/{stats['p95']:.0f}ms"
+                if stats['loss'] > 0:
+                    text += f" {stats['loss']:.0%} loss"
+                if stats['p95'] > 200 or stats['loss'] > 0.2:
+                    color = (1, 0.5, 0, 1)
+                else:
+                    color = (0, 0.8, 0, 1)
+        else:
             conn = self.get_current_connection()
             signal_strength = conn.check_signal_strength()
-            
-            if self.main_app:
-                signal_status = ["No Signal", "Weak Signal", "Strong Signal"]
-                signal_colors = [(1, 0, 0, 1), (1, 0.5, 0, 1), (0, 0.8, 0, 1)]
-                
-                if hasattr(self.main_app, 'signal_status_label'):
-                    self.main_app.signal_status_label.text = signal_status[signal_strength]
-                    self.main_app.signal_status_label.color = signal_colors[signal_strength]
+            signal_status = ["No Signal", "Weak Signal", "Strong Signal"]
+            signal_colors = [(1, 0, 0, 1), (1, 0.5, 0, 1), (0, 0.8, 0, 1)]
+            text, color = signal_status[signal_strength], signal_colors[signal_strength]
+        
+        if self.command_sender:
+            text += f"\nQ {self.link_quality.quality:.0%} @ {self.command_sender.tick_rate:.0f}Hz"
+        
+        if hasattr(self.main_app, 'signal_status_label'):
+            self.main_app.signal_status_label.text = text
+            self.main_app.signal_status_label.color = color
 
 class BatteryIndicator(Widget):
     level = NumericProperty(85)
@@ -2483,6 +5119,8 @@ class CombinedAppRoot(FloatLayout):
     connection_status = StringProperty("Disconnected")
     accelerometer_mode = BooleanProperty(False)
     connection_type = StringProperty("ble")
+    link_quality = NumericProperty(1.0)
+    control_rate = NumericProperty(30)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -2497,6 +5135,7 @@ class CombinedAppRoot(FloatLayout):
         self.connection_manager = ConnectionManager()
         self.connection_manager.main_app = self
         self.connection_manager.set_battery_callback(self.update_battery_level)
+        self._prewarm_connection()
         self.accelerometer_manager = AccelerometerManager()
         self.accelerometer_manager.controller = self
         self.vibration_manager = VibrationManager()
@@ -2511,6 +5150,8 @@ class CombinedAppRoot(FloatLayout):
         self._accelerometer_button_cooldown = False
         self._was_connected = False
         self.signal_check_event = None
+        self.control_loop_event = None
+        self.control_loop_mode = False
 
         with self.canvas.before:
             Color(1, 1, 1, 1)
@@ -2555,6 +5196,28 @@ class CombinedAppRoot(FloatLayout):
         
         print("CombinedAppRoot initialized successfully")
 
+    def _prewarm_connection(self):
+        """اتصال به آخرین دستگاه همزمان با ساخت رابط کاربری"""
+        if not get_setting('auto_connect', True):
+            return
+        
+        address = get_setting('last_connected_device', '')
+        if not address:
+            return
+        
+        conn_type = get_setting('last_connection_type', '') or get_setting('connection_type', 'ble')
+        self.connection_type = conn_type
+        self.connection_manager.set_connection_type(conn_type)
+        print(f"Pre-warming connection to {address} via {conn_type.upper()}")
+        
+        self.connection_status = f"Connecting via {conn_type.upper()}..."
+        self.connected_device = f"Connecting: {address.split(' ')[0]}"
+        self.connection_manager.connect(
+            address,
+            on_progress=self.on_connect_progress,
+            on_done=lambda future: self.on_connect_finished(future, address)
+        )
+
     def handle_exception(self, exc_type, exc_value, exc_traceback):
         print("Unhandled exception occurred!")
         traceback.print_exception(exc_type, exc_value, exc_traceback)
@@ -2649,6 +5312,57 @@ class CombinedAppRoot(FloatLayout):
             self.show_connection_message("Signal lost! Trying to reconnect...", "warning")
             
             self.connection_manager.disconnect()
+    
+    def on_reconnected(self, elapsed_ms):
+        status_suffix = {
+            'ble': '(BLE)',
+            'classic': '(Classic BT)', 
+            'wifi': '(WiFi)'
+        }
+        self.connection_status = f"Connected {status_suffix.get(self.connection_type, '')}"
+        self.connected_device = f"Connected: {self.connection_manager.device_name}"
+        
+        self.play_connection_sound_and_vibrate()
+        self.show_connection_message(f"Reconnected in {elapsed_ms / 1000:.1f}s", "success")
+        self.restore_session()
+    
+    def on_reconnect_failed(self):
+        self.connection_status = "Disconnected"
+        self.connected_device = "Not Connected"
+        self.show_connection_message("Reconnect failed - please connect again", "error")
+    
+    def restore_session(self):
+        """Re-send gear, lights and accelerometer mode after a reconnect.
+
+        The car resets its outputs when its link drops. Loss declared on our side (no pong)
+        always tears the transport down in on_signal_lost, so the car sees that drop too and
+        the toggle commands below switch its outputs back on rather than off.
+        """
+        if self.control_loop_mode:
+            # فریم وضعیت مطلق است (دنده و راهنما هم در آن است)؛ یک tick فوری کافی است
+            self._control_tick(0)
+            commands = []
+        else:
+            steer = self.widgets.get('steer')
+            pedal = self.widgets.get('pedal')
+            commands = [self.current_gear]
+            if steer and not self.accelerometer_mode:
+                commands.append(f"S{steering_value_from_angle(steer.angle):02d}")
+            if pedal:
+                commands.append(f"G{int(pedal.pedal_value):02d}")
+            if self.current_turn_signal:
+                commands.append(self.current_turn_signal)
+        
+        for name in ('light', 'led', 'rgb', 'start'):
+            w = self.widgets.get(name)
+            if isinstance(w, ImageButton) and w.is_active:
+                commands.append(w.command)
+        if self.accelerometer_mode:
+            commands.append('ACC1')
+        
+        for command in commands:
+            self.send_command(command)
+        print(f"Session restored: {'state frame, ' if self.control_loop_mode else ''}{commands}")
 
     def _load_saved_settings(self, dt=None):
         print("Loading saved settings...")
@@ -2660,6 +5374,7 @@ class CombinedAppRoot(FloatLayout):
         
         sensitivity = get_setting('sensitivity', 1.0)
         self.accelerometer_manager.sensitivity = sensitivity
+        self.accelerometer_manager.calibration.set_sensitivity(sensitivity)
         print(f"Sensitivity loaded: {sensitivity}")
         
         button_vibration_intensity = get_setting('button_vibration_intensity', 0.5)
@@ -2672,6 +5387,8 @@ class CombinedAppRoot(FloatLayout):
         self.vibration_manager.set_pedal_vibration_range(pedal_min_vibration, pedal_max_vibration)
         
         print(f"Vibration settings loaded")
+        
+        self.set_control_loop_mode(get_setting('control_loop_mode', False))
 
     def _update_ui_positions(self):
         win_w, win_h = Window.size
@@ -2712,13 +5429,7 @@ class CombinedAppRoot(FloatLayout):
         self.command_log.size = (cmd_log_width, cmd_log_height)
 
     def update_battery_level(self, level):
-        def update_ui(dt):
-            self.battery_level = f"{level}%"
-            
-            if 'battery_indicator' in self.widgets:
-                self.widgets['battery_indicator'].level = level
-                
-        Clock.schedule_once(update_ui, 0)
+        self.battery_level = f"{level}%"
 
     def _build_ui(self, dt):
         if self._ui_built:
@@ -2793,7 +5504,6 @@ class CombinedAppRoot(FloatLayout):
                         try:
                             level = int(''.join(filter(str.isdigit, battery_text)))
                             battery_indicator.level = level
-                            battery_indicator._update_canvas()
                         except (ValueError, TypeError) as e:
                             print(f"Battery indicator update error: {e}")
                     
@@ -3122,7 +5832,39 @@ class CombinedAppRoot(FloatLayout):
             
             self._was_connected = is_connected
 
+    def set_control_loop_mode(self, enabled):
+        self.control_loop_mode = bool(enabled)
+        set_setting('control_loop_mode', self.control_loop_mode)
+        
+        if self.control_loop_event:
+            self.control_loop_event.cancel()
+            self.control_loop_event = None
+        
+        if self.control_loop_mode:
+            interval_ms = max(10, int(get_setting('control_loop_interval_ms', 50)))
+            self.control_loop_event = Clock.schedule_interval(self._control_tick, interval_ms / 1000.0)
+            print(f"Control loop started ({interval_ms} ms)")
+        else:
+            print("Control loop stopped")
+    
+    def _control_tick(self, dt):
+        if not self.connection_manager.connected or not self._ui_built:
+            return
+        
+        steer = self.widgets.get('steer')
+        pedal = self.widgets.get('pedal')
+        steering = steering_value_from_angle(steer.angle) if steer else 50
+        throttle = int(pedal.pedal_value) if pedal else 0
+        
+        self.connection_manager.send_state(steering, throttle, self.current_gear, self.current_turn_signal)
+
     def send_command(self, command):
+        if self.control_loop_mode and command_channel(command) in ('S', 'G'):
+            self.command_log.update_command(command)
+            if hasattr(self, 'last_cmd_label'):
+                self.last_cmd_label.text = command
+            return True
+        
         print(f"Sending via {self.connection_type.upper()}: {command}")
         ok = self.connection_manager.send_command(command)
         self.command_log.update_command(command)
@@ -3246,9 +5988,24 @@ class CombinedAppRoot(FloatLayout):
             instance.color = instance.normal_color
             self.show_connection_message(f"Accelerometer error: {str(e)}", "error")
 
+    def is_vehicle_active(self, tilt_window=2.0):
+        """ورودی واقعی راننده: گاز، لمس کنترل‌ها یا شیب بیرون از deadzone در چند ثانیه اخیر.
+        دنده D یا روشن بودن حالت شتاب‌سنج به تنهایی حرکت حساب نمی‌شود"""
+        if self.accelerometer_mode:
+            if time.monotonic() - self.accelerometer_manager.last_tilt_active < tilt_window:
+                return True
+        
+        widgets = getattr(self, 'widgets', {})
+        pedal = widgets.get('pedal')
+        steer = widgets.get('steer')
+        if pedal and (pedal.pedal_value > 0 or pedal._touch_down):
+            return True
+        return bool(steer and steer._touch_down)
+
     def update_steering_from_accelerometer(self, angle):
+        # روی ترد UI و با نرخ tick کنترل صدا زده می‌شود
         if self.accelerometer_mode:
-            Clock.schedule_once(lambda dt: self._update_steer_angle(angle))
+            self._update_steer_angle(angle)
 
     def _update_steer_angle(self, angle):
         w = self.widgets.get('steer')
@@ -3444,12 +6201,33 @@ class CombinedAppRoot(FloatLayout):
                 
                 info_label = Label(
                     text=f'[b]{conn.get("name", "RC Car")}[/b]\n{conn.get("ip")}:{conn.get("port")}',
-                    size_hint_x=0.7,
+                    size_hint_x=0.55,
                     markup=True,
                     halign='left',
                     valign='middle'
                 )
                 
+                profile_btn = Button(
+                    text=conn.get('socket_profile', 'low_latency').replace('_', ' ').title(),
+                    size_hint_x=0.15,
+                    font_size='12sp',
+                    background_color=(0.2, 0.6, 0.9, 1)
+                )
+                
+                def create_profile_callback(ip, port):
+                    def callback(instance):
+                        profiles = list(SOCKET_PROFILES.keys())
+                        current = instance.text.lower().replace(' ', '_')
+                        next_profile = profiles[(profiles.index(current) + 1) % len(profiles)] if current in profiles else profiles[0]
+                        app.settings_manager.set_wifi_connection_profile(ip, port, next_profile)
+                        instance.text = next_profile.replace('_', ' ').title()
+                    return callback
+                
+                profile_btn.bind(on_press=create_profile_callback(
+                    conn.get('ip'), 
+                    conn.get('port')
+                ))
+                
                 connect_btn = Button(
                     text='Connect',
                     size_hint_x=0.15,
@@ -3489,6 +6267,7 @@ class CombinedAppRoot(FloatLayout):
                 ))
                 
                 item.add_widget(info_label)
+                item.add_widget(profile_btn)
                 item.add_widget(connect_btn)
                 item.add_widget(delete_btn)
                 list_layout.add_widget(item)
@@ -3589,10 +6368,16 @@ class CombinedAppRoot(FloatLayout):
             if not hasattr(self, 'device_list'):
                 print("device_list not available for update")
                 return
-                
-            self.device_list.clear_widgets()
             
+            if getattr(self, '_device_buttons_owner', None) is not self.device_list:
+                self._device_buttons_owner = self.device_list
+                self._device_buttons = {}
+                self._scan_again_btn = None
+                
             if not devices:
+                self.device_list.clear_widgets()
+                self._device_buttons = {}
+                
                 no_devices = Label(
                     text=f'No {self.connection_type.upper()} devices found', 
                     size_hint_y=None, 
@@ -3602,46 +6387,19 @@ class CombinedAppRoot(FloatLayout):
                 )
                 no_devices.bind(size=no_devices.setter('text_size'))
                 self.device_list.add_widget(no_devices)
-                
-                scan_again_btn = Button(
-                    text='Scan Again',
-                    size_hint_y=None,
-                    height=80,
-                    font_size='16sp',
-                    background_color=(0.2, 0.7, 0.3, 1)
-                )
-                
-                def scan_again(instance):
-                    loading = Label(
-                        text=f'Scanning for {self.connection_type.upper()} devices...', 
-                        size_hint_y=None, 
-                        height=60, 
-                        font_size='16sp'
-                    )
-                    self.device_list.clear_widgets()
-                    self.device_list.add_widget(loading)
-                    
-                    def start_scan():
-                        try:
-                            if self.connection_type == 'wifi':
-                                result = self.connection_manager.wifi.scanner.start_scan(self.on_scan_results)
-                            else:
-                                result = self.connection_manager.start_scan(self.on_scan_results)
-                            print(f"Rescan started for {self.connection_type}: {result}")
-                        except Exception as e:
-                            print(f"Rescan start error for {self.connection_type}: {e}")
-                            Clock.schedule_once(lambda dt: self._update_device_list([f"Scan error: {str(e)}"]))
-                    
-                    Clock.schedule_once(lambda dt: start_scan(), 0.1)
-                
-                scan_again_btn.bind(on_press=scan_again)
-                self.device_list.add_widget(scan_again_btn)
+                self.device_list.add_widget(self._get_scan_again_button())
                 return
-                
+            
+            # دکمه‌های موجود با آدرس دستگاه دوباره استفاده می‌شوند تا لیست در جا به‌روز شود
+            buttons = {}
             for dev in devices:
-                try:
+                key = self._device_key(dev)
+                if key in buttons:
+                    continue
+                    
+                btn = self._device_buttons.get(key)
+                if btn is None:
                     btn = Button(
-                        text=str(dev), 
                         size_hint_y=None, 
                         height=70,
                         text_size=(None, None),
@@ -3650,51 +6408,67 @@ class CombinedAppRoot(FloatLayout):
                         font_size='14sp',
                         padding=(10, 0)
                     )
+                    btn.bind(on_press=lambda instance: self._on_device_selected(instance, instance.device))
                     
-                    btn.bind(on_press=lambda instance, addr=dev: self._on_device_selected(instance, addr))
-                    self.device_list.add_widget(btn)
-                    
-                except Exception as e:
-                    print(f"Error adding device button: {e}")
-            
-            # اضافه کردن دکمه Scan Again در انتهای لیست
-            scan_again_btn = Button(
-                text='Scan Again',
-                size_hint_y=None,
-                height=80,
-                font_size='16sp',
-                background_color=(0.2, 0.7, 0.3, 1)
-            )
-            
-            def scan_again(instance):
-                loading = Label(
-                    text=f'Scanning for {self.connection_type.upper()} devices...', 
-                    size_hint_y=None, 
-                    height=60, 
-                    font_size='16sp'
-                )
+                btn.device = dev
+                btn.text = str(dev)
+                buttons[key] = btn
+            
+            self._device_buttons = buttons
+            ordered = list(buttons.values()) + [self._get_scan_again_button()]
+            current = list(reversed(self.device_list.children))
+            if any(btn.state == 'down' for btn in current if isinstance(btn, Button)):
+                # ردیفی که زیر انگشت است جابه‌جا نمی‌شود؛ ترتیب جدید در به‌روزرسانی بعدی اعمال می‌شود
+                pending = [btn for btn in ordered if btn not in current]
+                ordered = [w for w in current if w in ordered[:-1]] + pending + ordered[-1:]
+            if current != ordered:
                 self.device_list.clear_widgets()
-                self.device_list.add_widget(loading)
-                
-                def start_scan():
-                    try:
-                        if self.connection_type == 'wifi':
-                            result = self.connection_manager.wifi.scanner.start_scan(self.on_scan_results)
-                        else:
-                            result = self.connection_manager.start_scan(self.on_scan_results)
-                        print(f"Rescan started for {self.connection_type}: {result}")
-                    except Exception as e:
-                        print(f"Rescan start error for {self.connection_type}: {e}")
-                        Clock.schedule_once(lambda dt: self._update_device_list([f"Scan error: {str(e)}"]))
-                
-                Clock.schedule_once(lambda dt: start_scan(), 0.1)
-            
-            scan_again_btn.bind(on_press=scan_again)
-            self.device_list.add_widget(scan_again_btn)
+                for widget in ordered:
+                    self.device_list.add_widget(widget)
                     
         except Exception as e:
             print(f"Error in _update_device_list: {e}")
 
+    @staticmethod
+    def _device_key(dev):
+        return device_address_key(dev) or str(dev)
+
+    def _get_scan_again_button(self):
+        if self._scan_again_btn is not None:
+            return self._scan_again_btn
+        
+        scan_again_btn = Button(
+            text='Scan Again',
+            size_hint_y=None,
+            height=80,
+            font_size='16sp',
+            background_color=(0.2, 0.7, 0.3, 1)
+        )
+        
+        def scan_again(instance):
+            loading = Label(
+                text=f'Scanning for {self.connection_type.upper()} devices...', 
+                size_hint_y=None, 
+                height=60, 
+                font_size='16sp'
+            )
+            self.device_list.clear_widgets()
+            self.device_list.add_widget(loading)
+            
+            def start_scan():
+                try:
+                    result = self.connection_manager.start_scan(self.on_scan_results, force=True)
+                    print(f"Rescan started for {self.connection_type}: {result}")
+                except Exception as e:
+                    print(f"Rescan start error for {self.connection_type}: {e}")
+                    Clock.schedule_once(lambda dt: self._update_device_list([f"Scan error: {str(e)}"]))
+            
+            Clock.schedule_once(lambda dt: start_scan(), 0.1)
+        
+        scan_again_btn.bind(on_press=scan_again)
+        self._scan_again_btn = scan_again_btn
+        return scan_again_btn
+
     def _on_device_selected(self, instance, addr):
         try:
             print(f"{self.connection_type.upper()} Device selected: {addr}")
@@ -3720,9 +6494,27 @@ class CombinedAppRoot(FloatLayout):
             self.connection_status = f"Connecting via {self.connection_type.upper()}..."
             self.connected_device = f"Connecting: {addr.split(' ')[0]}"
             
-            success = self.connection_manager.connect(addr)
-            
-            if success:
+            self.connection_manager.connect(
+                addr,
+                on_progress=self.on_connect_progress,
+                on_done=lambda future: self.on_connect_finished(future, addr)
+            )
+                
+        except Exception as e:
+            print(f"Error in _connect_and_close: {e}")
+            self.show_connection_message(f"Connection error: {str(e)}", "error")
+
+    def on_connect_progress(self, future, phase):
+        phase_text = {
+            'socket': 'Preparing',
+            'link': 'Connecting',
+            'services': 'Discovering services',
+        }
+        self.connection_status = f"{phase_text.get(phase, phase.title())} ({self.connection_type.upper()})..."
+
+    def on_connect_finished(self, future, addr):
+        try:
+            if future.state == 'done':
                 self.connection_status = "Connected"
                 status_suffix = {
                     'ble': '(BLE)',
@@ -3743,20 +6535,32 @@ class CombinedAppRoot(FloatLayout):
                     f"Connected successfully via {self.connection_type.upper()}!", 
                     "success"
                 )
+            elif future.state == 'cancelled':
+                self.connection_status = "Disconnected"
+                self.connected_device = "Not Connected"
+                print(f"Connection to {addr} cancelled")
             else:
                 self.connection_status = "Connection Failed"
                 self.connected_device = "Not Connected"
-                print(f"Failed to connect to: {addr} via {self.connection_type.upper()}")
+                print(f"Failed to connect to: {addr} via {self.connection_type.upper()}: {future.error}")
                 self.show_connection_message(
-                    f"Connection failed via {self.connection_type.upper()}!", 
+                    f"Connection failed via {self.connection_type.upper()}: {future.error}", 
                     "error"
                 )
                 
         except Exception as e:
-            print(f"Error in _connect_and_close: {e}")
+            print(f"Error in on_connect_finished: {e}")
             self.show_connection_message(f"Connection error: {str(e)}", "error")
 
     def disconnect_device(self):
+        if self.connection_manager.connect_future:
+            self.connection_manager.cancel_connect()
+        
+        if self.connection_manager.reconnecting:
+            self.connection_manager.cancel_reconnect()
+            self.connection_status = "Disconnected"
+            self.connected_device = "Not Connected"
+        
         if self.connection_manager.connected:
             print("Disconnecting device...")
             
@@ -3857,6 +6661,15 @@ class CombinedAppRoot(FloatLayout):
             )
             content.add_widget(self.conn_title)
             
+            if self.connection_manager.connected:
+                content.add_widget(Label(
+                    text=self.connection_manager.get_diagnostics_summary(),
+                    size_hint_y=0.1,
+                    font_size='12sp',
+                    text_size=(Window.width * 0.8, None),
+                    halign='center'
+                ))
+            
             self.dynamic_content = BoxLayout(orientation='vertical', size_hint_y=0.7)
             content.add_widget(self.dynamic_content)
             
@@ -3894,7 +6707,7 @@ class CombinedAppRoot(FloatLayout):
                     # اسکن WiFi
                     def start_wifi_scan():
                         try:
-                            result = self.connection_manager.wifi.scanner.start_scan(self.on_scan_results)
+                            result = self.connection_manager.start_scan(self.on_scan_results)
                             print(f"WiFi scan started: {result}")
                         except Exception as e:
                             print(f"WiFi scan start error: {e}")
@@ -3962,7 +6775,7 @@ class CombinedAppRoot(FloatLayout):
             
             def on_disconnect_press(instance):
                 try:
-                    if self.connection_manager.connected:
+                    if self.connection_manager.connected or self.connection_manager.reconnecting or self.connection_manager.connect_future:
                         self.disconnect_device()
                         if hasattr(self, 'conn_popup'):
                             self.conn_popup.dismiss()
@@ -4021,6 +6834,7 @@ class CombinedAppRoot(FloatLayout):
             vibration_enabled = get_setting('vibration_enabled', False)
             pedal_min_vibration = get_setting('pedal_min_vibration', 0.1)
             pedal_max_vibration = get_setting('pedal_max_vibration', 1.0)
+            control_rate = get_setting('control_rate_hz', 30)
             
             content = BoxLayout(orientation='vertical', spacing=12, padding=15)
             content.add_widget(Label(text='Settings', size_hint_y=0.08, font_size='20sp', bold=True))
@@ -4232,8 +7046,266 @@ class CombinedAppRoot(FloatLayout):
             battery_layout.add_widget(battery_slider)
             right_column.add_widget(battery_layout)
             
+            control_rate_layout = BoxLayout(orientation='vertical', size_hint_y=0.35, spacing=5)
+            control_rate_label = Label(
+                text=f'Control Rate: {int(control_rate)} Hz', 
+                size_hint_y=0.3, 
+                font_size='14sp'
+            )
+            control_rate_layout.add_widget(control_rate_label)
+            
+            control_rate_slider = Slider(
+                min=5,
+                max=60,
+                value=control_rate,
+                size_hint_y=0.7
+            )
+            
+            def on_control_rate_change(instance, value):
+                rate = int(value)
+                control_rate_label.text = f'Control Rate: {rate} Hz'
+                self.connection_manager.set_control_rate(rate)
+                self.accelerometer_manager.set_tick_rate(rate)
+                
+            control_rate_slider.bind(value=on_control_rate_change)
+            control_rate_layout.add_widget(control_rate_slider)
+            right_column.add_widget(control_rate_layout)
+            
+            control_loop_layout = BoxLayout(orientation='horizontal', size_hint_y=0.15, spacing=10)
+            control_loop_label = Label(
+                text='Control Loop:', 
+                size_hint_x=0.7, 
+                font_size='14sp'
+            )
+            control_loop_toggle = ToggleButton(
+                text='ON' if self.control_loop_mode else 'OFF',
+                state='down' if self.control_loop_mode else 'normal',
+                size_hint_x=0.3,
+                background_color=(0.2, 0.8, 0.2, 1) if self.control_loop_mode else (0.8, 0.2, 0.2, 1)
+            )
+            
+            def on_control_loop_toggle(instance):
+                enabled = instance.state == 'down'
+                instance.text = 'ON' if enabled else 'OFF'
+                instance.background_color = (0.2, 0.8, 0.2, 1) if enabled else (0.8, 0.2, 0.2, 1)
+                self.set_control_loop_mode(enabled)
+            
+            control_loop_toggle.bind(on_press=on_control_loop_toggle)
+            control_loop_layout.add_widget(control_loop_label)
+            control_loop_layout.add_widget(control_loop_toggle)
+            right_column.add_widget(control_loop_layout)
+            
+            tilt_column = BoxLayout(orientation='vertical', spacing=10, size_hint_x=0.34)
+            tilt_title = Label(
+                text='Tilt Steering', 
+                size_hint_y=0.1, 
+                font_size='16sp',
+                bold=True,
+                color=(0.2, 0.4, 0.8, 1)
+            )
+            tilt_column.add_widget(tilt_title)
+            
+            tilt_filter = self.accelerometer_manager.tilt_filter
+            filter_layout = BoxLayout(orientation='horizontal', size_hint_y=0.1, spacing=10)
+            filter_label = Label(
+                text='Filter:', 
+                size_hint_x=0.45, 
+                font_size='14sp'
+            )
+            filter_btn = Button(
+                text=tilt_filter.kind.replace('_', ' ').title(),
+                size_hint_x=0.55,
+                font_size='13sp',
+                background_color=(0.2, 0.6, 0.9, 1)
+            )
+            
+            def on_filter_press(instance):
+                current = self.accelerometer_manager.tilt_filter.kind
+                next_kind = TILT_FILTERS[(TILT_FILTERS.index(current) + 1) % len(TILT_FILTERS)]
+                self.accelerometer_manager.set_filter(next_kind)
+                instance.text = next_kind.replace('_', ' ').title()
+            
+            filter_btn.bind(on_press=on_filter_press)
+            filter_layout.add_widget(filter_label)
+            filter_layout.add_widget(filter_btn)
+            tilt_column.add_widget(filter_layout)
+            
+            deadzone_layout = BoxLayout(orientation='vertical', size_hint_y=0.18, spacing=5)
+            deadzone_label = Label(
+                text=f'Deadzone: {tilt_filter.deadzone:.1f}°', 
+                size_hint_y=0.4, 
+                font_size='13sp'
+            )
+            deadzone_layout.add_widget(deadzone_label)
+            
+            deadzone_slider = Slider(
+                min=0.0,
+                max=6.0,
+                value=tilt_filter.deadzone,
+                size_hint_y=0.6
+            )
+            
+            def on_deadzone_change(instance, value):
+                self.accelerometer_manager.set_filter(self.accelerometer_manager.tilt_filter.kind, deadzone=round(value, 1))
+                deadzone_label.text = f'Deadzone: {value:.1f}°'
+                
+            deadzone_slider.bind(value=on_deadzone_change)
+            deadzone_layout.add_widget(deadzone_slider)
+            tilt_column.add_widget(deadzone_layout)
+            
+            latency_btn = Button(
+                text='Measure Filter Latency',
+                size_hint_y=0.1,
+                font_size='13sp',
+                background_color=(0.2, 0.6, 0.9, 1)
+            )
+            latency_label = Label(
+                text='', 
+                size_hint_y=0.22, 
+                font_size='11sp'
+            )
+            
+            def on_measure_latency(instance):
+                lines = []
+                for kind, result in self.accelerometer_manager.get_filter_latency().items():
+                    latency = result['step_latency_ms']
+                    latency_text = f"{latency:.0f} ms" if latency is not None else "no settle"
+                    lines.append(f"{kind.replace('_', ' ').title()}: {latency_text}, {result['cost_us']:.1f} µs")
+                latency_label.text = '\n'.join(lines)
+            
+            latency_btn.bind(on_press=on_measure_latency)
+            tilt_column.add_widget(latency_btn)
+            tilt_column.add_widget(latency_label)
+            
+            calibration_title = Label(
+                text='Calibration', 
+                size_hint_y=0.08, 
+                font_size='14sp',
+                bold=True
+            )
+            tilt_column.add_widget(calibration_title)
+            
+            calibration_label = Label(
+                text='', 
+                size_hint_y=0.12, 
+                font_size='11sp'
+            )
+            
+            def refresh_calibration_label():
+                calibration = self.accelerometer_manager.get_calibration()
+                neutral = 'set' if calibration['neutral'] else 'flat'
+                calibration_label.text = (
+                    f"Neutral: {neutral}  L {calibration['max_tilt_left']:.0f}° / R {calibration['max_tilt_right']:.0f}°"
+                )
+            
+            def run_capture(capture, *args):
+                if not self.accelerometer_mode:
+                    self.show_connection_message("Enable tilt steering to calibrate", "warning")
+                    return
+                if not capture(*args):
+                    self.show_connection_message(self.accelerometer_manager.capture_error, "warning")
+                refresh_calibration_label()
+            
+            neutral_btn = Button(
+                text='Capture Neutral',
+                size_hint_y=0.1,
+                font_size='13sp',
+                background_color=(0.2, 0.6, 0.9, 1)
+            )
+            neutral_btn.bind(on_press=lambda x: run_capture(self.accelerometer_manager.capture_neutral))
+            tilt_column.add_widget(neutral_btn)
+            
+            endpoints_layout = BoxLayout(orientation='horizontal', size_hint_y=0.1, spacing=8)
+            for side in ('left', 'right'):
+                endpoint_btn = Button(
+                    text=f'Capture {side.title()}',
+                    font_size='13sp',
+                    background_color=(0.2, 0.6, 0.9, 1)
+                )
+                endpoint_btn.bind(on_press=lambda x, side=side: run_capture(self.accelerometer_manager.capture_max_tilt, side))
+                endpoints_layout.add_widget(endpoint_btn)
+            tilt_column.add_widget(endpoints_layout)
+            
+            curve_layout = BoxLayout(orientation='horizontal', size_hint_y=0.1, spacing=10)
+            curve_label = Label(
+                text='Curve:', 
+                size_hint_x=0.45, 
+                font_size='14sp'
+            )
+            curve_btn = Button(
+                text=self.accelerometer_manager.calibration.curve.title(),
+                size_hint_x=0.55,
+                font_size='13sp',
+                background_color=(0.2, 0.6, 0.9, 1)
+            )
+            
+            def on_curve_press(instance):
+                calibration = self.accelerometer_manager.calibration
+                next_curve = TILT_CURVES[(TILT_CURVES.index(calibration.curve) + 1) % len(TILT_CURVES)]
+                points = None if calibration.curve_points else TILT_CUSTOM_CURVE
+                self.accelerometer_manager.set_response_curve(next_curve, points=points)
+                instance.text = next_curve.title()
+            
+            curve_btn.bind(on_press=on_curve_press)
+            curve_layout.add_widget(curve_label)
+            curve_layout.add_widget(curve_btn)
+            tilt_column.add_widget(curve_layout)
+            
+            profile_layout = BoxLayout(orientation='horizontal', size_hint_y=0.1, spacing=8)
+            profile_btn = Button(
+                text=self.accelerometer_manager.calibration_profile,
+                size_hint_x=0.6,
+                font_size='13sp',
+                background_color=(0.2, 0.6, 0.9, 1)
+            )
+            
+            def on_profile_press(instance):
+                profiles = self.accelerometer_manager.get_calibration_profiles()
+                if not profiles:
+                    return
+                current = self.accelerometer_manager.calibration_profile
+                next_profile = profiles[(profiles.index(current) + 1) % len(profiles)] if current in profiles else profiles[0]
+                if self.accelerometer_manager.load_calibration(next_profile):
+                    instance.text = next_profile
+                    curve_btn.text = self.accelerometer_manager.calibration.curve.title()
+                    refresh_calibration_label()
+            
+            def on_new_profile(instance):
+                profiles = self.accelerometer_manager.get_calibration_profiles()
+                name = f'profile {len(profiles) + 1}'
+                while name in profiles:
+                    name += '+'
+                self.accelerometer_manager.save_calibration(name)
+                profile_btn.text = name
+            
+            profile_btn.bind(on_press=on_profile_press)
+            new_profile_btn = Button(
+                text='Save As New',
+                size_hint_x=0.4,
+                font_size='12sp',
+                background_color=(0.2, 0.6, 0.9, 1)
+            )
+            new_profile_btn.bind(on_press=on_new_profile)
+            profile_layout.add_widget(profile_btn)
+            profile_layout.add_widget(new_profile_btn)
+            tilt_column.add_widget(profile_layout)
+            tilt_column.add_widget(calibration_label)
+            refresh_calibration_label()
+            
+            tilt_controls = {
+                'filter_btn': filter_btn,
+                'deadzone_slider': deadzone_slider,
+                'deadzone_label': deadzone_label,
+                'curve_btn': curve_btn,
+                'profile_btn': profile_btn,
+                'refresh_calibration': refresh_calibration_label,
+            }
+            
+            left_column.size_hint_x = 0.33
+            right_column.size_hint_x = 0.33
             main_layout.add_widget(left_column)
             main_layout.add_widget(right_column)
+            main_layout.add_widget(tilt_column)
             content.add_widget(main_layout)
             
             btns = BoxLayout(size_hint_y=0.12, spacing=15, padding=(10, 0))
@@ -4248,7 +7320,9 @@ class CombinedAppRoot(FloatLayout):
                 slider, sens_label, battery_slider, battery_label,
                 button_vib_slider, steering_vib_slider,
                 button_vib_label, steering_vib_label, vibration_toggle,
-                self.pedal_min_slider, self.pedal_max_slider, pedal_min_label, pedal_max_label
+                self.pedal_min_slider, self.pedal_max_slider, pedal_min_label, pedal_max_label,
+                control_rate_slider, control_rate_label, control_loop_toggle,
+                tilt_controls
             ))
             
             close_btn = Button(
@@ -4278,7 +7352,9 @@ class CombinedAppRoot(FloatLayout):
     def _reset_settings(self, sensitivity_slider, sens_label, battery_slider, battery_label,
                        button_vib_slider, steering_vib_slider,
                        button_vib_label, steering_vib_label, vibration_toggle,
-                       pedal_min_slider, pedal_max_slider, pedal_min_label, pedal_max_label):
+                       pedal_min_slider, pedal_max_slider, pedal_min_label, pedal_max_label,
+                       control_rate_slider, control_rate_label, control_loop_toggle,
+                       tilt_controls):
         
         try:
             App.get_running_app().settings_manager.reset_to_defaults()
@@ -4304,12 +7380,33 @@ class CombinedAppRoot(FloatLayout):
             pedal_max_slider.value = 1.0
             pedal_max_label.text = 'Max: 1.0'
             
+            control_rate_slider.value = 30
+            control_rate_label.text = 'Control Rate: 30 Hz'
+            
+            control_loop_toggle.state = 'normal'
+            control_loop_toggle.text = 'OFF'
+            control_loop_toggle.background_color = (0.8, 0.2, 0.2, 1)
+            
             self.accelerometer_manager.set_sensitivity(1.0)
             self.vibration_manager.set_button_intensity(0.5)
             self.vibration_manager.set_steering_intensity(0.5)
             self.vibration_manager.set_pedal_vibration_range(0.1, 1.0)
+            self.connection_manager.set_control_rate(30)
+            self.accelerometer_manager.set_tick_rate(30)
+            self.set_control_loop_mode(False)
             self.vibration_manager.has_vibrator = True
             
+            self.accelerometer_manager.set_filter('none')
+            tilt_controls['filter_btn'].text = 'None'
+            tilt_controls['deadzone_slider'].value = 2.0
+            tilt_controls['deadzone_label'].text = 'Deadzone: 2.0°'
+            
+            # حافظه و ذخیره‌سازی هم‌زمان بازنشانی می‌شوند تا save بعدی مقادیر قدیمی را برنگرداند
+            self.accelerometer_manager.reset_calibration()
+            tilt_controls['curve_btn'].text = 'Linear'
+            tilt_controls['profile_btn'].text = 'default'
+            tilt_controls['refresh_calibration']()
+            
             print("All settings reset to default")
         except Exception as e:
             print(f"Error resetting settings: {e}")
@@ -19,6 +19,7 @@ class SettingsManager:
             'steering_sensitivity': 1.0,
             'battery_warning_level': 30,
             'last_connected_device': '',
+            'last_connection_type': '',
             'connection_type': 'ble',
             'classic_device_address': '',
             'classic_device_port': '1',
@@ -31,6 +32,28 @@ class SettingsManager:
             'vibration_enabled': True,
             'pedal_min_vibration': 0.1,
             'pedal_max_vibration': 1.0,
+            'wifi_socket_profile': 'low_latency',
+            'wifi_control_transport': 'tcp',
+            'wifi_udp_port': 4210,
+            'control_rate_hz': 30,
+            'command_refresh_interval': 1.0,
+            'binary_protocol': False,
+            'control_loop_mode': False,
+            'control_loop_interval_ms': 50,
+            'gatt_cache': {},
+            'ble_scan_name_prefixes': [],
+            'ble_scan_service_uuids': [],
+            'tilt_filter': 'none',
+            'tilt_filter_alpha': 0.3,
+            'tilt_filter_min_cutoff': 1.0,
+            'tilt_filter_beta': 0.02,
+            'tilt_filter_median_size': 5,
+            'tilt_deadzone': 2.0,
+            'tilt_hysteresis': 1.0,
+            'tilt_sensor_mode': 'auto',
+            'tilt_neutral': None,
+            'tilt_profile': 'default',
+            'tilt_profiles': {},
             'saved_wifi_connections': []
         }
         
@@ -99,6 +122,7 @@ class SettingsManager:
             'steering_sensitivity': 1.0,
             'battery_warning_level': 30,
             'last_connected_device': '',
+            'last_connection_type': '',
             'connection_type': 'ble',
             'classic_device_address': '',
             'classic_device_port': '1',
@@ -111,6 +135,27 @@ class SettingsManager:
             'vibration_enabled': True,
             'pedal_min_vibration': 0.1,
             'pedal_max_vibration': 1.0,
+            'wifi_socket_profile': 'low_latency',
+            'wifi_control_transport': 'tcp',
+            'wifi_udp_port': 4210,
+            'control_rate_hz': 30,
+            'command_refresh_interval': 1.0,
+            'binary_protocol': False,
+            'control_loop_mode': False,
+            'control_loop_interval_ms': 50,
+            'gatt_cache': {},
+            'ble_scan_name_prefixes': [],
+            'ble_scan_service_uuids': [],
+            'tilt_filter': 'none',
+            'tilt_filter_alpha': 0.3,
+            'tilt_filter_min_cutoff': 1.0,
+            'tilt_filter_beta': 0.02,
+            'tilt_filter_median_size': 5,
+            'tilt_deadzone': 2.0,
+            'tilt_hysteresis': 1.0,
+            'tilt_sensor_mode': 'auto',
+            'tilt_neutral': None,
+            'tilt_profile': 'default',
             'saved_wifi_connections': []
         }
         
@@ -214,7 +259,7 @@ class SettingsManager:
     
     # ===== متدهای مربوط به saved_wifi_connections =====
     
-    def add_saved_wifi_connection(self, ip, port, connection_name=""):
+    def add_saved_wifi_connection(self, ip, port, connection_name="", socket_profile="low_latency"):
         """افزودن اتصال وای‌فای به تاریخچه"""
         try:
             saved_connections = self.get('saved_wifi_connections', [])
@@ -223,6 +268,7 @@ class SettingsManager:
                 "ip": ip,
                 "port": int(port),
                 "name": connection_name or f"RC_Car_{ip}",
+                "socket_profile": socket_profile,
                 "timestamp": time.time(),
                 "last_used": time.time()
             }
@@ -272,6 +318,59 @@ class SettingsManager:
             print(f"❌ Error updating connection usage: {e}")
             return False
     
+    def set_wifi_connection_profile(self, ip, port, socket_profile):
+        """تغییر پروفایل سوکت یک اتصال ذخیره شده"""
+        try:
+            connections = self.get('saved_wifi_connections', [])
+            for conn in connections:
+                if conn.get("ip") == ip and conn.get("port") == int(port):
+                    conn["socket_profile"] = socket_profile
+                    break
+            
+            self.set('saved_wifi_connections', connections)
+            return True
+        except Exception as e:
+            print(f"❌ Error updating socket profile: {e}")
+            return False
+    
+    # ===== متدهای مربوط به پروفایل‌های کالیبراسیون شیب =====
+    
+    def get_tilt_profiles(self):
+        """دریافت همه پروفایل‌های کالیبراسیون شیب"""
+        try:
+            return self.get('tilt_profiles', {})
+        except Exception as e:
+            print(f"❌ Error getting tilt profiles: {e}")
+            return {}
+    
+    def get_tilt_profile(self, name):
+        """دریافت یک پروفایل کالیبراسیون (None اگر وجود نداشته باشد)"""
+        return self.get_tilt_profiles().get(name)
+    
+    def save_tilt_profile(self, name, calibration):
+        """ذخیره نقطه خنثی، نقاط انتهایی و منحنی پاسخ در یک پروفایل"""
+        try:
+            profiles = self.get_tilt_profiles()
+            profiles[name] = dict(calibration, last_used=time.time())
+            self.set('tilt_profiles', profiles)
+            print(f"✅ Tilt profile saved: {name}")
+            return True
+        except Exception as e:
+            print(f"❌ Error saving tilt profile: {e}")
+            return False
+    
+    def remove_tilt_profile(self, name):
+        """حذف یک پروفایل کالیبراسیون"""
+        try:
+            profiles = self.get_tilt_profiles()
+            profiles.pop(name, None)
+            self.set('tilt_profiles', profiles)
+            print(f"✅ Removed tilt profile: {name}")
+            return True
+        except Exception as e:
+            print(f"❌ Error removing tilt profile: {e}")
+            return False
+    
     def clear_wifi_history(self):
         """پاک کردن تاریخچه وای‌فای"""
         try:
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+from main import LineFramer, PROTOCOL_BINARY_ACK
+
+
+def _lines(framer, data, **kwargs):
+    return [bytes(line) for line in framer.feed(data, **kwargs)]
+
+
+def _expecting_framer(acks, timeout=2.0):
+    framer = LineFramer(on_control_byte=acks.append)
+    framer.expect_control_byte(PROTOCOL_BINARY_ACK, timeout)
+    return framer
+
+
+def test_utf8_text_passes_through_unchanged():
+    acks = []
+    framer = _expecting_framer(acks)
+    text = 'TEMP ±3\nMOTOR 42°C\n'.encode('utf-8')
+    assert _lines(framer, text) == [b'TEMP \xc2\xb13', 'MOTOR 42°C'.encode('utf-8')]
+    assert acks == []
+
+
+def test_control_byte_ignored_unless_expected():
+    acks = []
+    framer = LineFramer(on_control_byte=acks.append)
+    assert _lines(framer, b'\xb1BAT 70\n') == [b'\xb1BAT 70']
+    assert acks == []
+
+
+def test_split_line_reassembled():
+    framer = LineFramer()
+    assert _lines(framer, b'BAT ') == []
+    assert _lines(framer, b'80\r\nSPD 5\n') == [b'BAT 80', b'SPD 5']
+
+
+def test_control_byte_recognised_only_at_line_start_once():
+    acks = []
+    framer = _expecting_framer(acks)
+    assert _lines(framer, b'BAT 80\nA\xb1\n\xb1BAT 70\n\xb1X\n') == [b'BAT 80', b'A\xb1', b'BAT 70', b'\xb1X']
+    assert acks == [PROTOCOL_BINARY_ACK]
+
+
+def test_control_byte_as_standalone_packet():
+    acks = []
+    framer = LineFramer(on_control_byte=acks.append)
+    assert _lines(framer, b'BAT') == []
+    framer.expect_control_byte(PROTOCOL_BINARY_ACK, 2.0)
+    assert _lines(framer, b'\xb1', packet=True) == []
+    assert _lines(framer, b' 80\n') == [b'BAT 80']
+    assert acks == [PROTOCOL_BINARY_ACK]
+
+
+def test_control_byte_ignored_after_deadline():
+    acks = []
+    framer = _expecting_framer(acks, timeout=-1.0)
+    assert _lines(framer, b'\xb1\n') == [b'\xb1']
+    assert acks == []
@@ -0,0 +1,75 @@
+import socket
+
+import pytest
+
+pytest.importorskip('kivy')
+
+import main
+from main import SimpleWiFiManager, UDPControlTransport
+
+
+class StandInCar:
+    """گیرنده UDP با همان قاعده پذیرش ماشین"""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(1.0)
+        self.port = self.socket.getsockname()[1]
+        self.last_seq = None
+        self.accepted = []
+        self.rejected = []
+
+    def receive(self):
+        datagram = self.socket.recv(600)
+        seq = UDPControlTransport.HEADER.unpack_from(datagram)[0]
+        payload = datagram[UDPControlTransport.HEADER.size:]
+        if self.last_seq is None or 1 <= (seq - self.last_seq) % 2**32 <= 2**31:
+            self.last_seq = seq
+            self.accepted.append(payload)
+        else:
+            self.rejected.append(payload)
+
+    def close(self):
+        self.socket.close()
+
+
+@pytest.fixture
+def car(monkeypatch):
+    car = StandInCar()
+    monkeypatch.setattr(main, 'get_setting', lambda key, default=None: car.port if key == 'wifi_udp_port' else default)
+    yield car
+    car.close()
+
+
+def _reconnect(wifi):
+    wifi._open_udp_control('127.0.0.1')
+    wifi.connected = True
+
+
+def test_reconnect_keeps_sequence_when_clock_steps_back(car, monkeypatch):
+    wifi = SimpleWiFiManager()
+    _reconnect(wifi)
+    assert wifi.send_control_raw(b'S50\n')
+    car.receive()
+
+    wifi.disconnect()
+    monkeypatch.setattr(main.time, 'time', lambda: 1.0)
+    _reconnect(wifi)
+    assert wifi.send_control_raw(b'S60\n')
+    car.receive()
+
+    assert car.accepted == [b'S50\n', b'S60\n']
+    assert car.rejected == []
+
+
+def test_sequence_wraps_around(car):
+    wifi = SimpleWiFiManager()
+    _reconnect(wifi)
+    wifi.udp_control._seq = 0xFFFFFFFF
+    for command in (b'G10\n', b'G20\n'):
+        assert wifi.send_control_raw(command)
+        car.receive()
+
+    assert car.accepted == [b'G10\n', b'G20\n']
+    assert wifi.udp_control.get_diagnostics()['next_seq'] == 1